@@ -1,23 +1,37 @@
 import streamlit as st
 import pandas as pd
-import speech_recognition as sr
-from pydub import AudioSegment
 import io
-from streamlit_webrtc import webrtc_streamer, AudioProcessorBase, WebRtcMode
-import av
-from fpdf import FPDF
-from datetime import datetime
-import whisper
-import tempfile
 import os
-from rapidfuzz import process, fuzz
-import requests
+from datetime import datetime
+import time
+import logging
+import functools
 
 # Import custom modules
 from database_config import get_database_manager
 from theme_config import apply_theme, get_theme_colors
 from login_page import show_login_page, show_logout, check_authentication
+from reports_page import show_reports_page
 from utils import extract_prescription, word_to_num
+from prescription import PrescriptionItem, MEAL_TIMES
+from catalog import MedicineCatalog, CatalogStore
+from suggester import SymptomSuggester
+from dictation_store import ARCHIVE_CONFIG, DictationStore
+from prescription_editor import render_prescription_editor
+from audio_utils import transcribe_audio
+from inference_service import INFERENCE_CONFIG
+from transcription import create_engine
+import metrics
+import resource_governor
+# Heavy libraries (PyTorch behind the transcription engine, fpdf, requests)
+# are imported where they are first used, so the login page does not wait
+# on them. benchmarks/import_profile.py measures what is left.
+
+run_started = time.perf_counter()
+logger = logging.getLogger('ai_prescriptor')
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
 
 # Page configuration
 st.set_page_config(
@@ -31,29 +45,65 @@ st.set_page_config(
 if 'prescriptions' not in st.session_state:
     st.session_state['prescriptions'] = []
 
-# Load Whisper model for better transcription
-@st.cache_resource
-def load_whisper_model():
-    return whisper.load_model("base")
-
-whisper_model = load_whisper_model()
+# Load the speech-to-text engine (see transcription.py for the options) on
+# first use rather than at startup
+@st.cache_resource(show_spinner='Loading the speech recognition model...')
+def load_transcription_engine():
+    # Transcription runs in the shared inference service when one is configured
+    if INFERENCE_CONFIG['address']:
+        return None
+    return create_engine()
 
 # Load medicines data from CSV file
-@st.cache_data
+@st.cache_resource
 def load_medicines_data():
-    """Loads medicine data from a CSV file and caches it."""
+    """Loads the medicine catalog once per server and reloads it when the file changes."""
     try:
-        df = pd.read_csv('medicines.csv')
-        return df
+        store = CatalogStore('medicines.csv', interactions_path='interactions.csv')
     except FileNotFoundError:
         st.error("The 'medicines.csv' file was not found. Please make sure it's in the correct directory.")
-        return pd.DataFrame()
+        return None
+    store.watch(CATALOG_POLL_SECONDS)
+    return store
 
-medicines_df = load_medicines_data()
-if not medicines_df.empty:
-    medicines_list = medicines_df['name'].tolist()
-else:
-    medicines_list = []
+# Expose /metrics for Prometheus (no-op unless AI_PRESCRIPTOR_METRICS=1)
+@st.cache_resource
+def start_metrics_server():
+    return metrics.start_metrics_server()
+
+start_metrics_server()
+
+# Number of matches offered in the manual entry medicine picker
+MEDICINE_SEARCH_LIMIT = 20
+
+# Number of suggestions offered from prescription history
+HISTORY_SUGGESTION_LIMIT = 8
+
+# How often medicines.csv is checked for changes
+CATALOG_POLL_SECONDS = 2
+
+# Ollama server used for AI suggestions
+OLLAMA_URL = os.environ.get('AI_PRESCRIPTOR_OLLAMA_URL', 'http://localhost:11434')
+
+def log_run_time(section, started):
+    """Log server time spent on one run of the app or of a section"""
+    elapsed = time.perf_counter() - started
+    logger.info("%s run took %.1f ms", section, elapsed * 1000)
+    if metrics.enabled():
+        metrics.registry.observe(f'run_{section}', elapsed)
+
+def timed_section(section):
+    """Decorator logging the server time of every run of a section"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                log_run_time(section, started)
+        return wrapper
+    return decorator
 
 # Check authentication
 if not check_authentication():
@@ -63,6 +113,21 @@ if not check_authentication():
 # Get database manager
 db_manager = get_database_manager()
 
+# The catalog is first built here, after login, not before the login page
+catalog_store = load_medicines_data()
+# Take one snapshot per run so a reload never lands halfway through it
+catalog = catalog_store.current if catalog_store else MedicineCatalog(pd.DataFrame())
+medicines_df = catalog.df
+medicines_list = catalog.names
+
+# Suggestions mined from past prescriptions, built once per server and
+# kept current by the "Save to Database" button
+@st.cache_resource
+def load_symptom_suggester(_db_manager):
+    return SymptomSuggester.from_history(_db_manager.symptom_history())
+
+symptom_suggester = load_symptom_suggester(db_manager)
+
 # Apply theme
 theme = st.sidebar.radio('Theme', ['Light', 'Dark'], index=1 if st.session_state.get('theme') == 'Dark' else 0)
 st.session_state['theme'] = theme
@@ -80,59 +145,100 @@ if 'doctor' in st.session_state:
     if doctor.get('specialization'):
         st.sidebar.write(f"**Specialization:** {doctor['specialization']}")
 
-# --- MAIN LAYOUT ---
-st.title('🏥 AI Prescriptor')
-
-# Patient Info Section
-with st.expander('Patient Information', expanded=True):
-    with st.form('patient_info_form'):
-        col1, col2 = st.columns(2)
-        with col1:
-            name = st.text_input('Patient Name')
-            gender = st.selectbox('Gender', ['Male', 'Female', 'Other'])
-        with col2:
-            age = st.number_input('Age', min_value=0, max_value=120, step=1)
-            symptoms = st.text_area('Symptoms')
-        submitted = st.form_submit_button('Save Patient Info')
-    
-    if submitted:
-        if name and age > 0:
-            patient_data = {
-                'Name': name,
-                'Age': age,
-                'Gender': gender,
-                'Symptoms': symptoms
-            }
-            st.session_state['patient'] = patient_data
-            
-            # Save to database
-            patient_id = db_manager.save_patient(st.session_state['doctor']['id'], patient_data)
-            if patient_id:
-                st.session_state['patient_id'] = patient_id
-                st.success('Patient info saved successfully!')
-            else:
-                st.error('Failed to save patient info to database.')
+# Performance metrics panel for admins
+if metrics.enabled() and metrics.is_admin(st.session_state.get('doctor')):
+    with st.sidebar.expander('📈 Performance Metrics'):
+        summary = metrics.registry.summary()
+        if summary:
+            st.dataframe(pd.DataFrame(summary), hide_index=True)
         else:
-            st.warning('Please fill in patient name and age.')
+            st.write('No measurements yet.')
+        st.dataframe(pd.DataFrame(resource_governor.status()), hide_index=True)
+        st.caption(f"Prometheus endpoint: http://{metrics.METRICS_CONFIG['host']}:{metrics.METRICS_CONFIG['port']}/metrics")
 
-    # --- OLLAMA AI SUGGESTION ---
-    if symptoms:
-        if st.button('Suggest Medicines with AI (Llama3)'):
-            with st.spinner('Querying AI for suggestions...'):
-                # Prepare prompt with symptoms and a sample of medicine names + compositions
-                prompt = f"""
+# Reports only read the analytics tables, so they skip the prescribing UI entirely
+page = st.sidebar.radio('Page', ['Prescribe', 'Reports'])
+if page == 'Reports':
+    show_reports_page(db_manager, st.session_state['doctor'])
+    st.stop()
+
+# --- SECTIONS ---
+# Each section below is a fragment: using its widgets reruns only that
+# section, not the whole script. Sections share state only through
+# st.session_state:
+#   'patient', 'patient_id'  - written by the patient form (full rerun)
+#   'saved_prescriptions'    - line_id -> row as last saved for this
+#                              patient (see save_prescriptions)
+#   'prescriptions'          - appended to by the audio, AI and manual
+#                              sections, edited by the prescription list
+#   'suggested_medicines', 'ai_suggested_medicines' - private to their section
+# symptom_suggester is shared by all sessions and updated on save.
+# Adding to 'prescriptions' from another section goes through
+# add_to_prescription(), which reruns the app so the list is redrawn.
+
+def run_governed(workload, func, *args, **kwargs):
+    """Run CPU-heavy work in one of the workload's slots (see resource_governor.py).
+
+    Shows the queue position while waiting. Returns None after showing an
+    error if the workload's queue is full.
+    """
+    placeholder = st.empty()
+
+    def show_position(position):
+        placeholder.info(f"⏳ Queued, position {position}. The server is busy with other requests.")
+
+    try:
+        with resource_governor.slot(workload, on_wait=show_position):
+            placeholder.empty()
+            return func(*args, **kwargs)
+    except resource_governor.WorkloadBusy:
+        placeholder.empty()
+        st.error("The server is busy right now. Please try again in a moment.")
+        return None
+
+def add_to_prescription(item):
+    """Append a line to the prescription and redraw the prescription list"""
+    # A suggestion can be added twice; each line needs its own item and line_id
+    if any(existing is item for existing in st.session_state['prescriptions']):
+        item = PrescriptionItem(*item.to_row(), dictation_id=item.dictation_id)
+    st.session_state['prescriptions'].append(item)
+    st.session_state['last_added'] = item.medicine_name
+    st.rerun(scope='app')
+
+@st.fragment
+@timed_section('ai_suggestions')
+def ai_suggestion_section(symptoms):
+    # History suggestions need no model round trip, so they show straight away
+    with metrics.timer('history_suggest'):
+        history_suggestions = symptom_suggester.suggest(symptoms, HISTORY_SUGGESTION_LIMIT)
+    if history_suggestions:
+        st.write('### Often Prescribed for These Symptoms')
+        for i, suggestion in enumerate(history_suggestions):
+            col_med, col_btn = st.columns([4, 1])
+            with col_med:
+                st.write(suggestion['medicine'])
+                st.caption(f"Matches: {', '.join(suggestion['terms'])}")
+            with col_btn:
+                if st.button("Add", key=f"add_history_suggested_{i}"):
+                    add_to_prescription(PrescriptionItem(suggestion['medicine']))
+
+    if st.button('Suggest Medicines with AI (Llama3)'):
+        with st.spinner('Querying AI for suggestions...'):
+            # Prepare prompt with symptoms and a sample of medicine names + compositions
+            prompt = f"""
 Given the following patient symptoms: {symptoms}
 Suggest the most relevant medicines from this list, based on their compositions:
 """
-                # Limit to first 30 medicines for prompt size
-                for idx, row in medicines_df.iterrows():
-                    prompt += f"\n- {row['name']}: {row['short_composition1']} {row['short_composition2']}"
-                    if idx > 30:
-                        break
-                prompt += "\nReturn only the medicine names, comma separated."
-                try:
+            # Limit to first 30 medicines for prompt size
+            for _, row in medicines_df.head(32).iterrows():
+                prompt += f"\n- {row['name']}: {row['short_composition1']} {row['short_composition2']}"
+            prompt += "\nReturn only the medicine names, comma separated."
+            try:
+                import requests
+
+                with metrics.timer('ollama_generate'):
                     response = requests.post(
-                        "http://localhost:11434/api/generate",
+                        f"{OLLAMA_URL}/api/generate",
                         json={
                             "model": "llama3",
                             "prompt": prompt,
@@ -140,272 +246,380 @@ Suggest the most relevant medicines from this list, based on their compositions:
                         },
                         timeout=60
                     )
-                    result = response.json()
-                    ai_suggestions = [name.strip() for name in result['response'].split(',') if name.strip()]
-                    st.session_state['ai_suggested_medicines'] = ai_suggestions
-                except Exception as e:
-                    st.error(f"Ollama API error: {e}")
-        # Show AI suggestions with add buttons
-        if 'ai_suggested_medicines' in st.session_state and st.session_state['ai_suggested_medicines']:
-            st.write('### AI Suggested Medicines (Click "Add" to include in prescription)')
-            for i, med_name in enumerate(st.session_state['ai_suggested_medicines']):
-                col_med, col_btn = st.columns([4, 1])
-                with col_med:
-                    st.write(med_name)
-                with col_btn:
-                    if st.button(f"Add AI Suggestion", key=f"add_ai_suggested_{i}"):
-                        prescription = {
-                            'Medicine Name': med_name,
-                            'Number of Days': 1,
-                            'Dosage per Day': 1,
-                            'Meal Time': 'After Meal'
-                        }
-                        st.session_state['prescriptions'].append(prescription)
-                        st.success(f"Added {med_name} to prescription!")
+                result = response.json()
+                ai_suggestions = [name.strip() for name in result['response'].split(',') if name.strip()]
+                st.session_state['ai_suggested_medicines'] = ai_suggestions
+            except Exception as e:
+                st.error(f"Ollama API error: {e}")
+                if history_suggestions:
+                    st.info('The suggestions from past prescriptions above are still available.')
+    # Show AI suggestions with add buttons
+    if 'ai_suggested_medicines' in st.session_state and st.session_state['ai_suggested_medicines']:
+        st.write('### AI Suggested Medicines (Click "Add" to include in prescription)')
+        for i, med_name in enumerate(st.session_state['ai_suggested_medicines']):
+            col_med, col_btn = st.columns([4, 1])
+            with col_med:
+                st.write(med_name)
+            with col_btn:
+                if st.button(f"Add AI Suggestion", key=f"add_ai_suggested_{i}"):
+                    add_to_prescription(PrescriptionItem(med_name))
 
 # Audio Processing Functions
-def process_audio_file(audio_file):
-    """Process uploaded audio file"""
+def transcribe(source, format=None):
+    """Transcribe locally within the transcription slots, or through the inference service"""
+    engine = load_transcription_engine()
+    if engine is None:
+        # The inference service queues and batches requests itself
+        return transcribe_audio(None, source, format)
+    return run_governed('transcribe', transcribe_audio, engine, source, format)
+
+# Archive of dictation audio (see dictation_store.py); None when turned off
+@st.cache_resource
+def load_dictation_store():
+    return DictationStore() if ARCHIVE_CONFIG['path'] else None
+
+def archive_dictation(audio_bytes, format, transcript):
+    """Keep a dictation's audio and transcript for audits and reprocessing.
+
+    Returns the dictation id, or None if it was not archived. Failures are
+    only logged so they never hold up the prescription.
+    """
+    store = load_dictation_store()
+    if store is None:
+        return None
     try:
-        # Convert audio to WAV format
-        audio = AudioSegment.from_file(audio_file)
-        audio = audio.set_frame_rate(16000).set_channels(1)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            audio.export(temp_file.name, format="wav")
-            temp_path = temp_file.name
-        
-        # Transcribe using Whisper
-        result = whisper_model.transcribe(temp_path)
-        os.unlink(temp_path)  # Clean up temp file
-        
-        return result["text"]
+        # Not run_governed: a full queue skips archiving without an error
+        with resource_governor.slot('archive'):
+            audio_hash = store.put(audio_bytes, format)
     except Exception as e:
-        st.error(f"Error processing audio: {e}")
+        logger.warning("Could not archive dictation: %s", e)
         return None
+    engine = load_transcription_engine()
+    return db_manager.save_dictation(
+        st.session_state['doctor']['id'],
+        st.session_state.get('patient_id'),
+        audio_hash,
+        # The inference service does not report which model it runs
+        engine.label if engine else 'inference-service',
+        transcript
+    )
 
-def process_audio_input(audio_bytes):
-    """Process recorded audio input"""
+def process_audio(audio_bytes, format=None):
+    """Transcribe and archive a dictation; returns (transcript, dictation id)"""
     try:
-        audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="wav")
-        audio = audio.set_frame_rate(16000).set_channels(1)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            audio.export(temp_file.name, format="wav")
-            temp_path = temp_file.name
-        
-        # Transcribe using Whisper
-        result = whisper_model.transcribe(temp_path)
-        os.unlink(temp_path)  # Clean up temp file
-        
-        return result["text"]
+        transcribed_text = transcribe(io.BytesIO(audio_bytes), format=format)
     except Exception as e:
         st.error(f"Error processing audio: {e}")
-        return None
+        return None, None
+    if not transcribed_text:
+        return transcribed_text, None
+    return transcribed_text, archive_dictation(audio_bytes, format, transcribed_text)
 
-# Main prescription functionality
-if 'patient' in st.session_state:
-    # Audio Upload & Recording Section
+def process_audio_file(audio_file):
+    """Process uploaded audio file"""
+    return process_audio(audio_file.getvalue())
+
+def process_audio_input(audio_bytes):
+    """Process recorded audio input"""
+    return process_audio(audio_bytes, format="wav")
+
+def suggest_from_transcript(transcribed_text, dictation_id=None):
+    """Show the transcript and store the medicines found in it as suggestions"""
+    st.write('**Transcribed Text:**')
+    st.write(transcribed_text)
+    # Extract suggestions only (do not auto-add)
+    suggestions = run_governed('extract', extract_prescription, transcribed_text, medicines_list,
+                               phonetic_index=catalog.phonetic_index)
+    if suggestions is None:
+        return
+    for suggestion in suggestions:
+        suggestion.dictation_id = dictation_id
+    st.session_state['suggested_medicines'] = suggestions
+    if suggestions:
+        st.success(f'Found {len(suggestions)} medicine suggestion(s) from audio!')
+    else:
+        st.warning('No medicines found in the audio.')
+
+@st.fragment
+@timed_section('audio')
+def audio_section():
     with st.expander('Add Prescription via Audio', expanded=True):
         st.write('You can upload an audio file or record your prescription:')
         col1, col2 = st.columns(2)
-        
+
         with col1:
             uploaded_file = st.file_uploader('Upload an audio file', type=['wav', 'mp3', 'm4a'], key='audio_upload')
             if uploaded_file is not None:
                 if st.button('Process Uploaded Audio'):
                     with st.spinner('Processing audio...'):
-                        transcribed_text = process_audio_file(uploaded_file)
+                        transcribed_text, dictation_id = process_audio_file(uploaded_file)
                         if transcribed_text:
-                            st.write('**Transcribed Text:**')
-                            st.write(transcribed_text)
-                            # Extract suggestions only (do not auto-add)
-                            suggestions = extract_prescription(transcribed_text, medicines_list)
-                            st.session_state['suggested_medicines'] = suggestions
-                            if suggestions:
-                                st.success(f'Found {len(suggestions)} medicine suggestion(s) from audio!')
-                            else:
-                                st.warning('No medicines found in the audio.')
-        
+                            suggest_from_transcript(transcribed_text, dictation_id)
+
         with col2:
             simple_audio = st.audio_input('Record your prescription', key='audio_record')
             if simple_audio is not None:
                 if st.button('Process Recorded Audio'):
                     with st.spinner('Processing audio...'):
                         audio_bytes = simple_audio.read()
-                        transcribed_text = process_audio_input(audio_bytes)
+                        transcribed_text, dictation_id = process_audio_input(audio_bytes)
                         if transcribed_text:
-                            st.write('**Transcribed Text:**')
-                            st.write(transcribed_text)
-                            # Extract suggestions only (do not auto-add)
-                            suggestions = extract_prescription(transcribed_text, medicines_list)
-                            st.session_state['suggested_medicines'] = suggestions
-                            if suggestions:
-                                st.success(f'Found {len(suggestions)} medicine suggestion(s) from audio!')
-                            else:
-                                st.warning('No medicines found in the audio.')
+                            suggest_from_transcript(transcribed_text, dictation_id)
         # Show suggested medicines with add buttons
         if 'suggested_medicines' in st.session_state and st.session_state['suggested_medicines']:
             st.write('### Suggested Medicines (Click "Add" to include in prescription)')
             for i, med in enumerate(st.session_state['suggested_medicines']):
                 col_med, col_btn = st.columns([4, 1])
                 with col_med:
-                    st.write(f"{med['Medicine Name']} - {med['Number of Days']} days, {med.get('Dosage per Day', med.get('Tablets per Day', 1))} per day, {med['Meal Time']}")
+                    st.write(med.summary())
                 with col_btn:
                     if st.button(f"Add", key=f"add_suggested_{i}"):
-                        st.session_state['prescriptions'].append(med)
-                        st.success(f"Added {med['Medicine Name']} to prescription!")
+                        add_to_prescription(med)
 
-    # Manual Entry Section
+@st.fragment
+@timed_section('manual_entry')
+def manual_entry_section():
     with st.expander('Add Prescription Manually', expanded=False):
+        # Matching happens on the server; only the top matches reach the browser.
+        # st.text_input only sends its value on Enter or blur, not per keystroke,
+        # so the list updates when the doctor presses Enter.
+        query = st.text_input('Search Medicine', key='medicine_search', placeholder='Type a medicine name and press Enter')
+        matches = catalog.search(query, limit=MEDICINE_SEARCH_LIMIT)
+        if query and not matches:
+            st.warning('No medicines match your search.')
         with st.form('prescription_form'):
-            med_name = st.selectbox('Medicine Name', medicines_list)
+            med_name = st.selectbox('Medicine Name', matches)
             if med_name:
+                med_details = catalog.get(med_name)
                 try:
-                    med_details = medicines_df[medicines_df['name'].str.strip().str.lower() == med_name.strip().lower()].iloc[0]
                     st.info(f"**Details:** {med_details['manufacturer_name']} - {med_details['type']}")
-                except (IndexError, KeyError):
+                except (TypeError, KeyError):
                     st.warning("Could not retrieve details for the selected medicine.")
-            
+
             num_days = st.number_input('Number of Days', min_value=1, max_value=30, step=1, value=1)
             tablets_per_day = st.number_input('Dosage per Day', min_value=1, max_value=10, step=1, value=1)
-            meal_time = st.selectbox('When to take?', ['After Meal', 'Before Meal'])
+            meal_time = st.selectbox('When to take?', MEAL_TIMES)
             add_med = st.form_submit_button('Add Medicine')
-            
+
             if add_med and med_name:
-                prescription = {
-                    'Medicine Name': med_name,
-                    'Number of Days': num_days,
-                    'Dosage per Day': tablets_per_day,
-                    'Meal Time': meal_time
-                }
-                st.session_state['prescriptions'].append(prescription)
-                st.success('Medicine added to prescription!')
-
-    # Prescription List Section
+                add_to_prescription(PrescriptionItem(med_name, num_days, tablets_per_day, meal_time))
+
+def prescription_pdf(patient_info, prescriptions, doctor_info):
+    """Return the prescription PDF, re-rendering it only when its contents change.
+
+    Returns None if the server is too busy to render it now.
+    """
+    from pdf_generator import create_prescription_pdf
+
+    # The PDF is dated, so a session left open past midnight renders it again
+    key = (tuple(patient_info.items()), tuple(p.to_row() for p in prescriptions), doctor_info['id'],
+           datetime.now().date())
+    cached = st.session_state.get('prescription_pdf')
+    if cached is None or cached[0] != key:
+        pdf_bytes = run_governed('pdf', create_prescription_pdf, patient_info, prescriptions, doctor_info)
+        if pdf_bytes is None:
+            return None
+        cached = (key, pdf_bytes)
+        st.session_state['prescription_pdf'] = cached
+    return cached[1]
+
+@st.fragment
+@timed_section('prescription_list')
+def prescription_list_section():
     with st.expander('Current Prescription List', expanded=True):
+        if 'last_added' in st.session_state:
+            st.success(f"Added {st.session_state.pop('last_added')} to prescription!")
         if st.session_state['prescriptions']:
             st.write('### Edit Prescriptions')
-            for idx, prescription in enumerate(st.session_state['prescriptions']):
-                cols = st.columns([3, 2, 2, 3, 2])
-                with cols[0]:
-                    st.write(prescription['Medicine Name'])
-                with cols[1]:
-                    num_days = st.number_input('Number of Days', min_value=1, max_value=30, step=1, value=prescription['Number of Days'], key=f'edit_days_{idx}')
-                with cols[2]:
-                    dosage_per_day = st.number_input('Dosage per Day', min_value=1, max_value=10, step=1, value=prescription.get('Dosage per Day', prescription.get('Tablets per Day', 1)), key=f'edit_dosage_{idx}')
-                with cols[3]:
-                    meal_time = st.selectbox('Meal Time', ['After Meal', 'Before Meal'], index=0 if prescription['Meal Time'] == 'After Meal' else 1, key=f'edit_meal_{idx}')
-                with cols[4]:
-                    if st.button('Update', key=f'update_presc_{idx}'):
-                        st.session_state['prescriptions'][idx]['Number of Days'] = num_days
-                        st.session_state['prescriptions'][idx]['Dosage per Day'] = dosage_per_day
-                        st.session_state['prescriptions'][idx]['Meal Time'] = meal_time
-                        st.success(f"Updated {prescription['Medicine Name']}!")
-            st.write('---')
-            df = pd.DataFrame(st.session_state['prescriptions'])
-            st.table(df.rename(columns={'Dosage per Day': 'Dosage per Day'}))
-            
+            if render_prescription_editor(st.session_state['prescriptions']):
+                st.rerun(scope='fragment')
+
+            for warning in catalog.check_prescription(st.session_state['prescriptions']):
+                first, second = warning['medicines']
+                if warning['kind'] == 'duplicate':
+                    st.warning(f"⚠️ {first} and {second} both contain {', '.join(warning['ingredients'])}.")
+                else:
+                    st.warning(f"⚠️ {warning['severity'].capitalize()} interaction between {first} and {second} "
+                               f"({' + '.join(warning['ingredients'])}). {warning['note']}")
+
             col1, col2, col3 = st.columns(3)
-            
+
             with col1:
                 if st.button('Clear All Prescriptions'):
                     st.session_state['prescriptions'] = []
-                    st.rerun()
-            
+                    st.rerun(scope='fragment')
+
             with col2:
                 if st.button('Save to Database'):
                     if 'patient_id' in st.session_state:
+                        # Only lines added or changed since the last save are written
+                        saved = st.session_state.setdefault('saved_prescriptions', {})
+                        changes = []
                         success = db_manager.save_prescriptions(
                             st.session_state['patient_id'],
                             st.session_state['doctor']['id'],
-                            st.session_state['prescriptions']
+                            st.session_state['prescriptions'],
+                            saved,
+                            changes
                         )
                         if success:
+                            for day, symptoms, line_changes in changes:
+                                symptom_suggester.update_visit(
+                                    (st.session_state['patient_id'], day), symptoms, line_changes)
                             st.success('Prescriptions saved to database!')
                         else:
                             st.error('Failed to save prescriptions to database.')
                     else:
                         st.error('Please save patient info first.')
-            
+
             with col3:
-                # PDF Generation
-                class PDF(FPDF):
-                    def header(self):
-                        self.set_font('Helvetica', 'B', 15)
-                        self.cell(0, 10, 'AI Prescriptor - Medical Prescription', 0, 1, 'C')
-                        self.ln(5)
-
-                    def footer(self):
-                        self.set_y(-15)
-                        self.set_font('Helvetica', 'I', 8)
-                        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-                        self.set_y(-30)
-                        self.set_font('Helvetica', 'I', 10)
-                        self.cell(0, 10, 'Doctor\'s Signature: ___________________', 0, 1, 'R')
-
-                def create_prescription_pdf(patient_info, prescriptions, doctor_info):
-                    pdf = PDF('P', 'mm', 'A4')
-                    pdf.add_page()
-                    
-                    # Header with doctor info
-                    pdf.set_font('Helvetica', 'B', 12)
-                    pdf.cell(0, 10, f"Dr. {doctor_info['name']}", 0, 1, 'R')
-                    if doctor_info.get('specialization'):
-                        pdf.set_font('Helvetica', '', 10)
-                        pdf.cell(0, 8, f"Specialization: {doctor_info['specialization']}", 0, 1, 'R')
-                    pdf.ln(5)
-                    
-                    # Patient Info
-                    pdf.set_font('Helvetica', 'B', 12)
-                    pdf.cell(0, 10, 'Patient Information', 0, 1, 'L')
-                    pdf.set_font('Helvetica', '', 11)
-                    pdf.cell(0, 8, f"Name: {patient_info['Name']}", 0, 1, 'L')
-                    pdf.cell(0, 8, f"Age: {patient_info['Age']} / Gender: {patient_info['Gender']}", 0, 1, 'L')
-                    pdf.cell(0, 8, f"Date: {datetime.now().strftime('%Y-%m-%d')}", 0, 1, 'L')
-                    if patient_info.get('Symptoms'):
-                        pdf.cell(0, 8, f"Symptoms: {patient_info['Symptoms']}", 0, 1, 'L')
-                    pdf.ln(10)
-
-                    # Prescription Table Header
-                    pdf.set_font('Helvetica', 'B', 11)
-                    pdf.set_fill_color(230, 230, 230)
-                    col_widths = {'Medicine': 60, 'Days': 20, 'Dosage/Day': 25, 'Timing': 40}
-                    pdf.cell(col_widths['Medicine'], 10, 'Medicine Name', 1, 0, 'C', True)
-                    pdf.cell(col_widths['Days'], 10, 'Days', 1, 0, 'C', True)
-                    pdf.cell(col_widths['Dosage/Day'], 10, 'Dosage/Day', 1, 0, 'C', True)
-                    pdf.cell(col_widths['Timing'], 10, 'Timing', 1, 1, 'C', True)
-
-                    # Prescription Table Rows
-                    pdf.set_font('Helvetica', '', 10)
-                    for p in prescriptions:
-                        pdf.cell(col_widths['Medicine'], 10, p['Medicine Name'], 1, 0, 'L')
-                        pdf.cell(col_widths['Days'], 10, str(p['Number of Days']), 1, 0, 'C')
-                        pdf.cell(col_widths['Dosage/Day'], 10, str(p.get('Dosage per Day', p.get('Tablets per Day', 1))), 1, 0, 'C')
-                        pdf.cell(col_widths['Timing'], 10, p['Meal Time'], 1, 1, 'L')
-
-                    return bytes(pdf.output())
-
-                pdf_bytes = create_prescription_pdf(
-                    st.session_state['patient'], 
+                pdf_bytes = prescription_pdf(
+                    st.session_state['patient'],
                     st.session_state['prescriptions'],
                     st.session_state['doctor']
                 )
-                
-                st.download_button(
-                    label="Download Prescription PDF",
-                    data=pdf_bytes,
-                    file_name=f"prescription_{st.session_state['patient']['Name']}_{datetime.now().strftime('%Y%m%d')}.pdf",
-                    mime="application/pdf",
-                )
+
+                if pdf_bytes is not None:
+                    st.download_button(
+                        label="Download Prescription PDF",
+                        data=pdf_bytes,
+                        file_name=f"prescription_{st.session_state['patient']['Name']}_{datetime.now().strftime('%Y%m%d')}.pdf",
+                        mime="application/pdf",
+                    )
         else:
             st.info('No prescriptions added yet. Upload an audio file or manually add prescriptions above.')
 
+# --- MAIN LAYOUT ---
+st.title('🏥 AI Prescriptor')
+
+# Patient Info Section
+GENDERS = ['Male', 'Female', 'Other']
+
+def fill_from_returning_patient():
+    """Copy the picked returning patient's details into the patient form"""
+    patient = st.session_state.get('returning_patient')
+    if patient is not None:
+        st.session_state['patient_name'] = patient['patient_name']
+        st.session_state['patient_age'] = patient['age'] or 0
+        if patient['gender'] in GENDERS:
+            st.session_state['patient_gender'] = patient['gender']
+        st.session_state['patient_symptoms'] = ''
+
+def same_name(first, second):
+    return first.strip().casefold() == second.strip().casefold()
+
+def start_new_patient():
+    """Clear the form and forget the current patient, so nothing is saved over them"""
+    for key in ('patient_id', 'patient', 'saved_prescriptions'):
+        st.session_state.pop(key, None)
+    st.session_state['prescriptions'] = []
+    st.session_state['patient_lookup'] = ''
+    st.session_state['patient_name'] = ''
+    st.session_state['patient_age'] = 0
+    st.session_state['patient_symptoms'] = ''
+
+with st.expander('Patient Information', expanded=True):
+    # A save reruns the app to clear the returning-patient pick below, so
+    # the next patient typed in is not saved over them, and to show the
+    # current patient's controls
+    if st.session_state.pop('reset_patient_lookup', False):
+        st.session_state['patient_lookup'] = ''
+        st.success('Patient info saved successfully!')
+
+    # A patient's record is only changed through an explicit update, never
+    # because the next patient has the same name
+    current = st.session_state.get('patient')
+    if 'patient_id' in st.session_state and current:
+        current_col1, current_col2 = st.columns([3, 1])
+        with current_col1:
+            st.caption(f"Current patient: {current['Name']} - patient #{st.session_state['patient_id']}")
+        with current_col2:
+            st.button('New Patient', on_click=start_new_patient)
+
+    # Returning patients: pick an existing record so the visit reuses it
+    returning = None
+    lookup_col1, lookup_col2, lookup_col3 = st.columns([3, 1, 1])
+    with lookup_col1:
+        lookup_name = st.text_input('Find returning patient', key='patient_lookup',
+                                    placeholder='First letters of the name')
+    with lookup_col2:
+        lookup_gender = st.selectbox('Gender filter', ['Any'] + GENDERS)
+    with lookup_col3:
+        lookup_age = st.number_input('Age filter (0 = any)', min_value=0, max_value=120, step=1)
+    if lookup_name.strip():
+        matches = db_manager.search_patients(
+            st.session_state['doctor']['id'], lookup_name,
+            age=lookup_age or None,
+            gender=None if lookup_gender == 'Any' else lookup_gender,
+        )
+        if matches:
+            returning = st.selectbox(
+                'Returning patient', [None] + matches, key='returning_patient',
+                on_change=fill_from_returning_patient,
+                format_func=lambda p: 'New patient' if p is None else
+                f"{p['patient_name']} ({p['age']}, {p['gender']}) - patient #{p['id']}"
+            )
+        else:
+            st.caption('No matching patients; fill in the form to add a new one.')
+
+    with st.form('patient_info_form'):
+        col1, col2 = st.columns(2)
+        with col1:
+            name = st.text_input('Patient Name', key='patient_name')
+            gender = st.selectbox('Gender', GENDERS, key='patient_gender')
+        with col2:
+            age = st.number_input('Age', min_value=0, max_value=120, step=1, key='patient_age')
+            symptoms = st.text_area('Symptoms', key='patient_symptoms')
+        submitted = st.form_submit_button('Update Returning Patient' if returning else 'Save Patient Info')
+        update_current = False
+        if not returning and 'patient_id' in st.session_state and current:
+            update_current = st.form_submit_button('Update Current Patient')
+
+    if submitted or update_current:
+        if name and age > 0:
+            patient_data = {
+                'Name': name,
+                'Age': age,
+                'Gender': gender,
+                'Symptoms': symptoms
+            }
+            if update_current:
+                # e.g. to correct the current patient's age or symptoms
+                patient_id = st.session_state['patient_id']
+            elif returning and same_name(name, returning['patient_name']):
+                patient_id = returning['id']
+            else:
+                patient_id = None
+            st.session_state['patient'] = patient_data
+
+            # Save to database, reusing the record of a known patient
+            patient_id = db_manager.upsert_patient(st.session_state['doctor']['id'], patient_data, patient_id)
+            if patient_id:
+                if st.session_state.get('patient_id') != patient_id:
+                    # Lines saved for another patient must not be updated or deleted
+                    st.session_state['saved_prescriptions'] = {}
+                st.session_state['patient_id'] = patient_id
+                st.session_state['reset_patient_lookup'] = True
+                st.rerun()
+            else:
+                st.error('Failed to save patient info to database.')
+        else:
+            st.warning('Please fill in patient name and age.')
+
+    # --- OLLAMA AI SUGGESTION ---
+    if symptoms:
+        ai_suggestion_section(symptoms)
+
+# Main prescription functionality
+if 'patient' in st.session_state:
+    audio_section()
+    manual_entry_section()
+    prescription_list_section()
 else:
     st.info('Please fill in patient information above to start creating prescriptions.')
 
+log_run_time('app', run_started)
+
 # Database connection cleanup
 import atexit
-atexit.register(db_manager.close_connection) 
\ No newline at end of file
+atexit.register(db_manager.close_connection)
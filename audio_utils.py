@@ -0,0 +1,30 @@
+import metrics
+from inference_service import transcribe_remote
+
+# Whisper expects 16 kHz mono input
+SAMPLE_RATE = 16000
+
+
+def decode_to_pcm(source, format=None):
+    """Decode an audio file or file-like object to 16 kHz mono float32 samples"""
+    import numpy as np
+    from pydub import AudioSegment
+
+    with metrics.timer('audio_decode'):
+        audio = AudioSegment.from_file(source, format=format)
+        audio = audio.set_frame_rate(SAMPLE_RATE).set_channels(1)
+        samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+        return samples / float(1 << (8 * audio.sample_width - 1))
+
+
+def transcribe_audio(engine, source, format=None):
+    """Decode ``source`` and transcribe it with a TranscriptionEngine.
+
+    With ``engine`` set to None the shared inference service is used instead
+    (see inference_service.py).
+    """
+    samples = decode_to_pcm(source, format)
+    with metrics.timer('whisper_transcribe'):
+        if engine is None:
+            return transcribe_remote(samples)
+        return engine.transcribe(samples)
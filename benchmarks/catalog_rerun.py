@@ -0,0 +1,61 @@
+"""Per-rerun cost of loading the medicine catalog.
+
+``st.cache_data`` hands every rerun a fresh copy of the cached DataFrame
+(it round-trips the value through pickle), after which app.py rebuilt the
+name list. ``st.cache_resource`` returns the shared ``MedicineCatalog``
+as-is. This script reproduces both paths without a Streamlit server:
+
+    python benchmarks/catalog_rerun.py
+"""
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import MedicineCatalog
+from benchmarks.synthetic import medicines_frame
+
+SIZES = (10000, 250000)
+RERUNS = 5
+
+
+def _old_rerun(pickled):
+    df = pickle.loads(pickled)
+    medicines_list = df['name'].tolist()
+    # Details lookup for the selected medicine
+    df[df['name'].str.strip().str.lower() == medicines_list[-1].strip().lower()].iloc[0]
+    return df, medicines_list
+
+
+def _new_rerun(catalog):
+    medicines_list = catalog.names
+    catalog.get(medicines_list[-1])
+    return catalog, medicines_list
+
+
+def _measure(fn, arg):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        fn(arg)
+    elapsed = (time.perf_counter() - start) / RERUNS
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ms_per_rerun': round(elapsed * 1000, 3), 'peak_bytes': peak}
+
+
+def run():
+    results = {}
+    for size in SIZES:
+        df = medicines_frame(size)
+        results[f'cache_data_{size}'] = _measure(_old_rerun, pickle.dumps(df))
+        results[f'cache_resource_{size}'] = _measure(_new_rerun, MedicineCatalog(df))
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
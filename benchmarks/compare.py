@@ -0,0 +1,49 @@
+"""Compare two JSON reports written by run_benchmarks.py.
+
+    python benchmarks/compare.py before.json after.json [--threshold 10]
+
+Prints the median time of every case present in both reports and flags
+changes larger than the threshold (in percent). Exits with status 1 if
+any case got slower by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def _cases(report):
+    for suite, cases in report['results'].items():
+        for case, stats in cases.items():
+            if isinstance(stats, dict) and 'median_ms' in stats:
+                yield f'{suite}/{case}', stats['median_ms']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10.0, help='percent change to flag')
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = dict(_cases(json.load(f)))
+    with open(args.after) as f:
+        after = dict(_cases(json.load(f)))
+
+    regressions = 0
+    print(f"{'case':60} {'before ms':>12} {'after ms':>12} {'change':>9}")
+    for case in sorted(before.keys() & after.keys()):
+        old, new = before[case], after[case]
+        change = (new - old) / old * 100 if old else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  SLOWER'
+            regressions += 1
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f"{case:60} {old:12.3f} {new:12.3f} {change:+8.1f}%{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""In-process stand-in for the MySQL connection used by DatabaseManager.
+
+Wraps sqlite3 behind the small part of the mysql.connector API that
+database_config.py uses, so database code paths can be timed without a
+MySQL server. Timings measure our Python overhead and statement shape,
+not MySQL itself.
+"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_config import DatabaseManager
+
+SCHEMA = """
+CREATE TABLE doctors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_id TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    specialization TEXT,
+    email TEXT,
+    phone TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE patients (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_id INTEGER REFERENCES doctors(id),
+    patient_name TEXT NOT NULL COLLATE NOCASE,
+    age INTEGER,
+    gender TEXT,
+    symptoms TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE patient_visits (
+    patient_id INTEGER NOT NULL REFERENCES patients(id),
+    day DATE NOT NULL,
+    symptoms TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (patient_id, day)
+);
+CREATE INDEX idx_patients_doctor_name ON patients (doctor_id, patient_name, age, gender);
+CREATE TABLE prescriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id INTEGER REFERENCES patients(id),
+    doctor_id INTEGER REFERENCES doctors(id),
+    medicine_name TEXT NOT NULL,
+    days INTEGER,
+    tablets_per_day INTEGER,
+    meal_time TEXT,
+    dictation_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE dictations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_id INTEGER REFERENCES doctors(id),
+    patient_id INTEGER REFERENCES patients(id),
+    audio_hash TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_dictations_audio_hash ON dictations (audio_hash);
+CREATE TABLE dictation_transcripts (
+    audio_hash TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    transcript TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (audio_hash, engine)
+);
+CREATE TABLE prescribing_daily (
+    doctor_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    medicine_name TEXT NOT NULL,
+    prescription_count INTEGER NOT NULL DEFAULT 0,
+    total_days INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (doctor_id, day, medicine_name)
+);
+CREATE INDEX idx_prescribing_daily_day ON prescribing_daily (day);
+CREATE TABLE doctor_daily (
+    doctor_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    prescription_count INTEGER NOT NULL DEFAULT 0,
+    patient_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (doctor_id, day)
+);
+CREATE INDEX idx_doctor_daily_day ON doctor_daily (day);
+"""
+
+# MySQL upserts rewritten into SQLite's equivalent
+_UPSERT_RE = re.compile(r'ON DUPLICATE KEY UPDATE')
+_VALUES_RE = re.compile(r'VALUES\((\w+)\)')
+
+
+class StandInCursor:
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @staticmethod
+    def _sql(operation):
+        operation = _VALUES_RE.sub(r'excluded.\1', _UPSERT_RE.sub('ON CONFLICT DO UPDATE SET', operation))
+        return operation.replace('%s', '?')
+
+    def execute(self, operation, params=()):
+        self._cursor.execute(self._sql(operation), params)
+
+    def executemany(self, operation, seq_params):
+        self._cursor.executemany(self._sql(operation), seq_params)
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip([column[0] for column in self._cursor.description], row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, path=':memory:'):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    def is_connected(self):
+        return True
+
+    def cursor(self, dictionary=False, buffered=None):
+        return StandInCursor(self._connection.cursor(), dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+
+def standin_database_manager(path=':memory:'):
+    """Return a DatabaseManager bound to a fresh sqlite stand-in"""
+    manager = DatabaseManager.__new__(DatabaseManager)
+    manager.connection = StandInConnection(path)
+    manager._lock = threading.RLock()
+    cursor = manager.connection.cursor()
+    cursor.execute("INSERT INTO doctors (doctor_id, password_hash, name) VALUES (%s, %s, %s)",
+                   ('bench', 'x', 'Bench Doctor'))
+    manager.connection.commit()
+    return manager
@@ -0,0 +1,69 @@
+"""Render time of the "Current Prescription List" section.
+
+Runs the old per-row widget layout and the ``st.data_editor`` grid through
+Streamlit's ``AppTest`` for several list sizes:
+
+    python benchmarks/editor_render.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.testing.v1 import AppTest
+
+SIZES = (5, 20, 50)
+RUNS = 5
+
+
+def _per_row_script():
+    import streamlit as st
+    import pandas as pd
+    from prescription import MEAL_TIMES, to_table
+
+    for idx, prescription in enumerate(st.session_state['prescriptions']):
+        cols = st.columns([3, 2, 2, 3, 2])
+        with cols[0]:
+            st.write(prescription.medicine_name)
+        with cols[1]:
+            st.number_input('Number of Days', min_value=1, max_value=30, step=1, value=prescription.days, key=f'edit_days_{idx}')
+        with cols[2]:
+            st.number_input('Dosage per Day', min_value=1, max_value=10, step=1, value=prescription.dosage_per_day, key=f'edit_dosage_{idx}')
+        with cols[3]:
+            st.selectbox('Meal Time', MEAL_TIMES, key=f'edit_meal_{idx}')
+        with cols[4]:
+            st.button('Update', key=f'update_presc_{idx}')
+    st.table(pd.DataFrame(to_table(st.session_state['prescriptions'])))
+
+
+def _grid_script():
+    import streamlit as st
+    from prescription_editor import render_prescription_editor
+
+    render_prescription_editor(st.session_state['prescriptions'])
+
+
+def _time_script(script, size):
+    from prescription import PrescriptionItem
+
+    at = AppTest.from_function(script, default_timeout=30)
+    at.session_state['prescriptions'] = [PrescriptionItem(f'Medicine {i}', 5, 2) for i in range(size)]
+    at.run()  # warm-up
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        at.run()
+    return round((time.perf_counter() - start) / RUNS * 1000, 2)
+
+
+def run():
+    results = {}
+    for size in SIZES:
+        results[f'per_row_ms_{size}'] = _time_script(_per_row_script, size)
+        results[f'data_editor_ms_{size}'] = _time_script(_grid_script, size)
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
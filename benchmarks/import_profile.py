@@ -0,0 +1,107 @@
+"""Import-time profile of app.py's top-level imports.
+
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py --runs 9 --output imports.json
+
+Runs the module-level ``import`` statements of app.py (everything the
+login page waits on before its first paint) in fresh interpreters under
+``python -X importtime`` and reports the median cumulative time of each
+top-level module and of the whole set. Modules the Streamlit server has
+already imported before running the script (``--preloaded``) are
+imported first and left out of the numbers. Imports that fail because
+the package is not installed are listed as missing.
+"""
+import argparse
+import ast
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MARKER = '-- import profile start --'
+
+
+def top_level_imports(path):
+    """Source of the import statements at module level of ``path``"""
+    with open(path) as f:
+        source = f.read()
+    return [ast.get_source_segment(source, node) for node in ast.parse(source).body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def profile_code(statements, preloaded):
+    lines = [f'import {module}' for module in preloaded]
+    lines += ['import sys', f'print({MARKER!r}, file=sys.stderr, flush=True)', 'missing = []']
+    for statement in statements:
+        lines += ['try:', f'    {statement}', 'except ImportError as e:', '    missing.append(e.name)']
+    lines.append('print(",".join(m for m in missing if m), end="")')
+    return '\n'.join(lines)
+
+
+def run_once(code):
+    """Cumulative microseconds per top-level import, and the modules that were missing"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    timings = {}
+    started = False
+    for line in result.stderr.splitlines():
+        if line == MARKER:
+            started = True
+            continue
+        if not started or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, package = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module that pulled them in
+        if not package.startswith('  '):
+            timings[package.strip()] = int(cumulative)
+    return timings, [name for name in result.stdout.split(',') if name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--script', default=os.path.join(ROOT, 'app.py'), help='script whose imports are profiled')
+    parser.add_argument('--preloaded', default='streamlit', help='comma separated modules to exclude')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to take the median over')
+    parser.add_argument('--top', type=int, default=15, help='modules to list')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    preloaded = [module for module in args.preloaded.split(',') if module]
+    code = profile_code(top_level_imports(args.script), preloaded)
+    samples = collections.defaultdict(list)
+    totals = []
+    for _ in range(args.runs):
+        timings, missing = run_once(code)
+        for module, micros in timings.items():
+            samples[module].append(micros)
+        totals.append(sum(timings.values()))
+
+    modules = sorted(((module, statistics.median(values) / 1000) for module, values in samples.items()),
+                     key=lambda item: item[1], reverse=True)
+    report = {
+        'script': os.path.relpath(args.script, ROOT),
+        'total_ms': round(statistics.median(totals) / 1000, 1),
+        'modules_ms': {module: round(ms, 1) for module, ms in modules},
+        'missing': missing,
+    }
+
+    print(f"Imports of {report['script']}: {report['total_ms']} ms (median of {args.runs})", file=sys.stderr)
+    for module, ms in modules[:args.top]:
+        print(f'  {module:40} {ms:8.1f} ms', file=sys.stderr)
+    if missing:
+        print(f"  not installed: {', '.join(missing)}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
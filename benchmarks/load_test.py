@@ -0,0 +1,358 @@
+"""Concurrent-session load test for app.py.
+
+Drives N simulated doctors through app.py at the same time with
+Streamlit's ``AppTest``, all in one process like sessions on one
+Streamlit server:
+
+    login -> save patient -> AI suggestions -> record + transcribe
+    -> add a suggestion -> search + manual add -> save to database
+
+External services are replaced by local stand-ins so only our own code
+is measured: a stub Ollama HTTP server, the inference service
+(inference_service.py) with a stub model behind the real batcher, the
+sqlite database stand-in (db_standin.py) and a synthetic medicines.csv.
+
+    python benchmarks/load_test.py --sessions 1,4,16 --iterations 3
+    python benchmarks/load_test.py --sessions 8 --output load.json
+
+Reports p50/p95/p99 per step and overall throughput for every session
+count. The JSON output has ``median_ms`` per step, so two runs can be
+compared with ``benchmarks/compare.py``.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import medicines_frame, transcript
+
+PASSWORD = 'load-test'
+STEPS = ('first_paint', 'login', 'save_patient', 'ai_suggest', 'record_audio', 'transcribe',
+         'add_suggested', 'search', 'manual_add', 'save_db')
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def _stats(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'p50_ms': round(_percentile(samples, 0.50), 2),
+        'median_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(_percentile(samples, 0.95), 2),
+        'p99_ms': round(_percentile(samples, 0.99), 2),
+        'max_ms': round(samples[-1], 2),
+    }
+
+
+# --- Local stand-ins ---
+
+def start_ollama_stub(names, latency):
+    """Serve /api/generate, answering with catalog names after ``latency`` seconds"""
+    answer = json.dumps({'response': ', '.join(names)}).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(answer)))
+            self.end_headers()
+            self.wfile.write(answer)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def start_inference_stub(text, latency, max_batch_size, max_wait_ms):
+    """Run the inference service with a model that returns ``text`` after ``latency`` seconds per batch"""
+    from inference_service import DynamicBatcher, make_server
+
+    def transcribe_batch(audios):
+        time.sleep(latency)
+        return [text] * len(audios)
+
+    server = make_server('127.0.0.1:0', DynamicBatcher(transcribe_batch, max_batch_size, max_wait_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'127.0.0.1:{server.server_address[1]}'
+
+
+def dictation_wav(seconds=5.0, rate=16000):
+    """A silent mono WAV of a typical dictation length"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b'\0\0' * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def setup_environment(args, workdir):
+    """Point app.py at the local stand-ins and return the shared state sessions need"""
+    import database_config
+    from benchmarks.db_standin import standin_database_manager
+    from inference_service import INFERENCE_CONFIG
+
+    # Keep app.py's per-run timing lines out of the report
+    app_logger = logging.getLogger('ai_prescriptor')
+    app_logger.addHandler(logging.NullHandler())
+    app_logger.setLevel(logging.WARNING)
+
+    df = medicines_frame(args.catalog_size)
+    df.to_csv(os.path.join(workdir, 'medicines.csv'), index=False)
+    names = df['name'].tolist()
+
+    manager = standin_database_manager(os.path.join(workdir, 'load_test.db'))
+    for session in range(max(args.sessions)):
+        manager.register_doctor(f'doctor{session}', PASSWORD, f'Load Doctor {session}')
+    # app.py and login_page.py look the manager up through this function
+    database_config.get_database_manager = lambda: manager
+
+    os.environ['AI_PRESCRIPTOR_OLLAMA_URL'] = start_ollama_stub(names[:3], args.ollama_ms / 1000)
+    INFERENCE_CONFIG['address'] = start_inference_stub(
+        transcript(names, count=2), args.transcribe_ms / 1000, args.max_batch_size, args.max_wait_ms)
+    return names
+
+
+# --- Sessions ---
+
+def allow_concurrent_apptests():
+    """Let several AppTest sessions run at once in this process.
+
+    AppTest assumes one test at a time: every run installs a mock Runtime
+    and turns on the ``global.appTest`` option, undoing both on exit under
+    runs still in progress on other threads, and every run recompiles the
+    script (concurrent compiles also trip a CPython 3.11 ast bug). Keep the
+    latest mock available to all runs, leave the option on, and compile
+    app.py once, as a real Streamlit server does.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest
+
+    latest = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        if not latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(latest))
+
+    compiled = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = shared_bytecode
+    config.set_option('global.appTest', True)
+    # One run on its own so a runtime has been seen before sessions start
+    AppTest.from_string('import streamlit as st').run()
+
+
+class Session:
+    """One simulated doctor driving app.py through AppTest"""
+
+    def __init__(self, number, names, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.number = number
+        self.names = names
+        self.at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=timeout)
+        self.timings = {step: [] for step in STEPS}
+        self.errors = []
+
+    def _step(self, step, action):
+        started = time.perf_counter()
+        try:
+            action()
+        except Exception as e:
+            self.errors.append((step, f'{type(e).__name__}: {e}'))
+            return False
+        elapsed = (time.perf_counter() - started) * 1000
+        problems = [element.value for element in self.at.exception] + [element.value for element in self.at.error]
+        if problems:
+            self.errors.append((step, str(problems[0])))
+            return False
+        self.timings[step].append(elapsed)
+        return True
+
+    def _widget(self, kind, label):
+        return next(widget for widget in getattr(self.at, kind) if widget.label == label)
+
+    def login(self):
+        at = self.at
+        if not self._step('first_paint', at.run):
+            return False
+
+        def submit():
+            fields = [widget for widget in at.text_input if widget.form_id == 'login_form']
+            fields[0].input(f'doctor{self.number}')
+            fields[1].input(PASSWORD)
+            self._widget('button', 'Login').click()
+            at.run()
+        return self._step('login', submit)
+
+    def prescribe(self, iteration):
+        at = self.at
+        steps = []
+
+        def save_patient():
+            self._widget('text_input', 'Patient Name').input(f'Patient {self.number}-{iteration}')
+            self._widget('number_input', 'Age').set_value(30 + iteration)
+            self._widget('text_area', 'Symptoms').input('fever, cough and headache')
+            self._widget('button', 'Save Patient Info').click()
+            at.run()
+        steps.append(('save_patient', save_patient))
+
+        steps.append(('ai_suggest', lambda: self._widget('button', 'Suggest Medicines with AI (Llama3)').click().run()))
+
+        def record_audio():
+            at.audio_input(key='audio_record').set_value(('dictation.wav', dictation_wav(), 'audio/wav'))
+            at.run()
+        steps.append(('record_audio', record_audio))
+        steps.append(('transcribe', lambda: self._widget('button', 'Process Recorded Audio').click().run()))
+        steps.append(('add_suggested', lambda: at.button(key='add_suggested_0').click().run()))
+
+        steps.append(('search', lambda: at.text_input(key='medicine_search').input(self.names[iteration][:5]).run()))
+        steps.append(('manual_add', lambda: self._widget('button', 'Add Medicine').click().run()))
+
+        steps.append(('save_db', lambda: self._widget('button', 'Save to Database').click().run()))
+
+        for step, action in steps:
+            if not self._step(step, action):
+                return False
+        return True
+
+
+def run_load(names, sessions, args):
+    """Run ``sessions`` concurrent sessions and return their timings and errors"""
+    barrier = threading.Barrier(sessions)
+
+    def drive(number):
+        session = Session(number, names, args.timeout)
+        barrier.wait()
+        if session.login():
+            for iteration in range(args.iterations):
+                if not session.prescribe(iteration):
+                    break
+        return session
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        finished = list(pool.map(drive, range(sessions)))
+    wall = time.perf_counter() - started
+
+    timings = {step: [] for step in STEPS}
+    errors = []
+    for session in finished:
+        for step, samples in session.timings.items():
+            timings[step].extend(samples)
+        errors.extend(session.errors)
+    saved = len(timings['save_db'])
+    result = {step: _stats(samples) for step, samples in timings.items()}
+    result['throughput'] = {
+        'wall_s': round(wall, 2),
+        'steps_per_s': round(sum(len(samples) for samples in timings.values()) / wall, 2),
+        'prescriptions_per_min': round(saved / wall * 60, 2),
+        'errors': len(errors),
+        'first_errors': [f'{step}: {message}' for step, message in errors[:5]],
+    }
+    return result
+
+
+def _print_table(sessions, result):
+    print(f"\n{sessions} concurrent session(s): "
+          f"{result['throughput']['prescriptions_per_min']} prescriptions/min, "
+          f"{result['throughput']['errors']} errors", file=sys.stderr)
+    print(f"  {'step':16} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}", file=sys.stderr)
+    for step in STEPS:
+        stats = result[step]
+        if stats['count']:
+            print(f"  {step:16} {stats['count']:5d} {stats['p50_ms']:9.1f} {stats['p95_ms']:9.1f} "
+                  f"{stats['p99_ms']:9.1f}", file=sys.stderr)
+    for error in result['throughput']['first_errors']:
+        print(f"  error: {error}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', default='1,4,16', help='comma separated concurrent session counts')
+    parser.add_argument('--iterations', type=int, default=3, help='prescriptions per session')
+    parser.add_argument('--catalog-size', type=int, default=10000, help='rows in the synthetic medicines.csv')
+    parser.add_argument('--ollama-ms', type=float, default=200, help='stub Ollama response time')
+    parser.add_argument('--transcribe-ms', type=float, default=300, help='stub model time per batch')
+    parser.add_argument('--max-batch-size', type=int, default=8)
+    parser.add_argument('--max-wait-ms', type=float, default=50)
+    parser.add_argument('--timeout', type=float, default=120, help='seconds allowed per script run')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+    args.sessions = [int(count) for count in args.sessions.split(',')]
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key != 'output'},
+        },
+        'results': {},
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # app.py reads medicines.csv from the working directory
+        os.chdir(workdir)
+        try:
+            names = setup_environment(args, workdir)
+            allow_concurrent_apptests()
+            for sessions in args.sessions:
+                result = run_load(names, sessions, args)
+                report['results'][f'sessions_{sessions}'] = result
+                _print_table(sessions, result)
+        finally:
+            os.chdir(cwd)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""Benchmark suite for the core prescription pipeline.
+
+Runs each suite, prints a summary and writes machine-readable JSON that
+can be compared between commits with ``benchmarks/compare.py``:
+
+    python benchmarks/run_benchmarks.py --output bench_output.json
+    python benchmarks/run_benchmarks.py --suites extraction --sizes 1000,10000
+
+Suites:
+    extraction  extract_prescription, medicine search and word_to_num on
+                synthetic catalogs
+    audio       decode + tiny Whisper transcription of the bundled recordings
+                (engine comparison: transcription_engines.py)
+    pdf         create_prescription_pdf for 1-50 items
+    database    save_prescriptions against a sqlite stand-in (db_standin.py):
+                first save, unchanged re-save and re-save after one edit
+    catalog     full catalog build vs incremental reload of changed rows
+    suggester   history-based symptom suggestions: index build and lookup
+
+Suites whose optional dependencies (Whisper, FFmpeg) are missing are
+reported as skipped rather than failing the run.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import medicine_names, mishear, transcript
+from prescription import PrescriptionItem
+
+DEFAULT_SIZES = (1000, 10000, 100000, 250000)
+PDF_SIZES = (1, 5, 10, 25, 50)
+AUDIO_FILES = ('Recording.m4a', 'ttsMP3.com_VoiceText_2025-6-24_8-27-30.mp3')
+
+
+def measure(func, repeat, warmup=1):
+    """Call ``func`` repeatedly and return timing statistics in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'repeat': repeat,
+        'min_ms': round(samples[0], 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+    }
+
+
+def _accuracy(extract, names, seeds=20):
+    """Recall and precision of the medicines extracted from misheard dictations.
+
+    Recall alone rewards padding the result with wrong names, so precision
+    (the share of extracted items that were dictated) is reported with it.
+    """
+    import random
+
+    hits = total = extracted = 0
+    for seed in range(seeds):
+        wanted = random.Random(seed).sample(names, 2)
+        text = ' and '.join(f"{mishear(name)} five days" for name in wanted)
+        found = [item.medicine_name for item in extract(text)]
+        hits += len(set(found) & set(wanted))
+        total += len(wanted)
+        extracted += len(found)
+    return {'recall': round(hits / total, 3), 'precision': round(hits / extracted, 3) if extracted else 0.0}
+
+
+def bench_extraction(args):
+    from utils import extract_prescription, word_to_num
+    from phonetic import PhoneticIndex
+
+    results = {}
+    for size in args.sizes:
+        names = medicine_names(size)
+        index = PhoneticIndex(names)
+        texts = [transcript(names, seed=seed) for seed in range(3)]
+        # Large catalogs take seconds per call; keep the run time bounded
+        repeat = args.repeat if size <= 10000 else max(1, args.repeat // 5)
+        results[f'extract_prescription[{size}]'] = measure(
+            lambda: [extract_prescription(text, names) for text in texts], repeat)
+        results[f'extract_prescription_phonetic[{size}]'] = measure(
+            lambda: [extract_prescription(text, names, phonetic_index=index) for text in texts], args.repeat)
+        results[f'misheard_accuracy[{size}]'] = {
+            'full_scan': _accuracy(lambda text: extract_prescription(text, names), names,
+                                   seeds=5 if size > 10000 else 20),
+            'phonetic': _accuracy(lambda text: extract_prescription(text, names, phonetic_index=index), names),
+        }
+    results.update(bench_search(args))
+    words = ['one', 'two', 'to', 'ten', 'eleven', 'Five'] * 100
+    results['word_to_num[600 words]'] = measure(lambda: [word_to_num(word) for word in words], args.repeat)
+    return results
+
+
+def bench_search(args):
+    from search_index import MedicineSearchIndex
+
+    results = {}
+    for size in args.sizes:
+        names = medicine_names(size)
+        index = MedicineSearchIndex(names)
+        # A prefix, a full name and a misspelt brand word
+        queries = [names[0][:3], names[-1].lower(), mishear(names[len(names) // 2])]
+        results[f'medicine_search[{size}]'] = measure(
+            lambda: [index.search(query, 20) for query in queries], args.repeat)
+    return results
+
+
+def bench_audio(args):
+    try:
+        from audio_utils import decode_to_pcm, transcribe_audio
+        from transcription import create_engine
+        engine = create_engine('whisper', 'tiny', 'default')
+    except ImportError as e:
+        return {'skipped': f'missing dependency: {e.name}'}
+
+    results = {}
+    for filename in AUDIO_FILES:
+        path = os.path.join(ROOT, filename)
+        try:
+            results[f'decode[{filename}]'] = measure(lambda: decode_to_pcm(path), args.repeat)
+        except FileNotFoundError as e:
+            # pydub raises this when FFmpeg is not installed
+            return {'skipped': f'audio decode failed: {e}'}
+        results[f'transcribe_tiny[{filename}]'] = measure(
+            lambda: transcribe_audio(engine, path), max(1, args.repeat // 5))
+    return results
+
+
+def bench_pdf(args):
+    from pdf_generator import create_prescription_pdf
+
+    patient = {'Name': 'Bench Patient', 'Age': 40, 'Gender': 'Other', 'Symptoms': 'fever, cough'}
+    doctor = {'id': 1, 'name': 'Bench Doctor', 'specialization': 'General Medicine'}
+    results = {}
+    for size in PDF_SIZES:
+        items = [PrescriptionItem(name, 5, 2) for name in medicine_names(size)]
+        results[f'create_prescription_pdf[{size}]'] = measure(
+            lambda: create_prescription_pdf(patient, items, doctor), args.repeat)
+    return results
+
+
+def bench_database(args):
+    from benchmarks.db_standin import standin_database_manager
+
+    manager = standin_database_manager()
+    patient_id = manager.save_patient(1, {'Name': 'Bench Patient', 'Age': 40, 'Gender': 'Other', 'Symptoms': ''})
+    results = {}
+    for size in (1, 10, 50):
+        items = [PrescriptionItem(name, 5, 2) for name in medicine_names(size)]
+        # Without a snapshot of the saved lines every save inserts them all
+        results[f'save_prescriptions[{size}]'] = measure(
+            lambda: manager.save_prescriptions(patient_id, 1, items), args.repeat)
+
+        items = [PrescriptionItem(name, 5, 2) for name in medicine_names(size)]
+        saved = {}
+        manager.save_prescriptions(patient_id, 1, items, saved)
+        results[f'resave_unchanged[{size}]'] = measure(
+            lambda: manager.save_prescriptions(patient_id, 1, items, saved), args.repeat)
+
+        def edit_one():
+            items[0].days = 12 - items[0].days
+            manager.save_prescriptions(patient_id, 1, items, saved)
+        results[f'resave_one_edit[{size}]'] = measure(edit_one, args.repeat)
+    return results
+
+
+def bench_catalog(args):
+    from benchmarks.synthetic import medicines_frame
+    from catalog import MedicineCatalog
+
+    size = max(args.sizes)
+    df = medicines_frame(size)
+    results = {f'full_build[{size}]': measure(lambda: MedicineCatalog(df), max(1, args.repeat // 5), warmup=0)}
+    catalog = MedicineCatalog(df)
+    for changed in (1, 100, 10000):
+        if changed > size:
+            continue
+        edited = df.copy()
+        edited.loc[:changed - 1, 'name'] = edited.loc[:changed - 1, 'name'] + ' Forte'
+        results[f'incremental_reload[{size} rows, {changed} changed]'] = measure(
+            lambda: catalog.updated(edited), max(1, args.repeat // 5), warmup=0)
+    return results
+
+
+def bench_suggester(args):
+    import random
+    from suggester import SymptomSuggester
+
+    terms = ['fever', 'cough', 'headache', 'nausea', 'vomiting', 'rash', 'itching', 'sore throat',
+             'body ache', 'fatigue', 'diarrhoea', 'acidity', 'back pain', 'cold', 'dizziness', 'insomnia']
+    names = medicine_names(2000)
+    rng = random.Random(0)
+    results = {}
+    for size in args.sizes:
+        visits = [(', '.join(rng.sample(terms, 3)), rng.sample(names, 4)) for _ in range(size)]
+        visits = [((visit, 0), symptoms, medicine)
+                  for visit, (symptoms, medicines) in enumerate(visits) for medicine in medicines]
+        results[f'build[{size} visits]'] = measure(
+            lambda: SymptomSuggester.from_history(visits), max(1, args.repeat // 5), warmup=0)
+        suggester = SymptomSuggester.from_history(visits)
+        results[f'suggest[{size} visits]'] = measure(
+            lambda: suggester.suggest('high fever with cough and body aches', 8), args.repeat)
+    return results
+
+
+SUITES = {
+    'extraction': bench_extraction,
+    'audio': bench_audio,
+    'pdf': bench_pdf,
+    'database': bench_database,
+    'catalog': bench_catalog,
+    'suggester': bench_suggester,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suites', default=','.join(SUITES), help='comma separated suites to run')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='catalog sizes for extraction')
+    parser.add_argument('--repeat', type=int, default=10, help='timed repetitions per case')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(',')]
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': {},
+    }
+    for suite in args.suites.split(','):
+        print(f'Running {suite}...', file=sys.stderr)
+        report['results'][suite] = SUITES[suite](args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
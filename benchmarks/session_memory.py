@@ -0,0 +1,57 @@
+"""Per-session memory of the prescription list.
+
+Compares the old display-keyed dicts with ``PrescriptionItem`` for the
+list sizes a doctor typically builds. Run from the project root:
+
+    python benchmarks/session_memory.py
+"""
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prescription import PrescriptionItem
+
+SIZES = (5, 20, 50)
+
+
+def _legacy_item(i):
+    return {
+        'Medicine Name': f'Medicine {i} 500mg Tablet',
+        'Number of Days': 5,
+        'Dosage per Day': 2,
+        'Meal Time': 'After Meal'
+    }
+
+
+def _item(i):
+    return PrescriptionItem(f'Medicine {i} 500mg Tablet', 5, 2, 'After Meal')
+
+
+# Measure a large batch so allocator free lists do not hide the cost
+SAMPLE = 10000
+
+
+def _per_item(factory):
+    """Average bytes allocated per prescription line"""
+    tracemalloc.start()
+    items = [factory(i) for i in range(SAMPLE)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current / SAMPLE
+
+
+def run():
+    results = {}
+    legacy, slotted = _per_item(_legacy_item), _per_item(_item)
+    for size in SIZES:
+        results[f'dict_{size}'] = round(legacy * size)
+        results[f'slots_{size}'] = round(slotted * size)
+    return results
+
+
+if __name__ == '__main__':
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,59 @@
+"""Synthetic data shared by the benchmark scripts"""
+import random
+import re
+
+import pandas as pd
+
+_SYLLABLES = ('a', 'ce', 'cro', 'do', 'flu', 'lo', 'mox', 'na', 'par', 'pan',
+              'ri', 'sol', 'ta', 'tri', 'vi', 'zol', 'zin', 'xa', 'ke', 'mi')
+_FORMS = ('Tablet', 'Capsule', 'Syrup', 'Injection', 'Cream', 'Suspension')
+_INGREDIENTS = ('Paracetamol', 'Amoxycillin', 'Azithromycin', 'Cetirizine', 'Pantoprazole',
+                'Ibuprofen', 'Metformin', 'Omeprazole', 'Clavulanic Acid', 'Domperidone')
+
+
+def medicine_names(count, seed=0):
+    """Return ``count`` plausible, mostly unique brand-style medicine names"""
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        brand = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.append(f"{brand} {rng.choice((100, 250, 500, 650))}mg {rng.choice(_FORMS)}")
+    return names
+
+
+def medicines_frame(count, seed=0):
+    """Return a DataFrame shaped like medicines.csv"""
+    rng = random.Random(seed)
+    names = medicine_names(count, seed)
+    return pd.DataFrame({
+        'id': range(1, count + 1),
+        'name': names,
+        'manufacturer_name': [f"Pharma {rng.randint(1, 500)} Ltd" for _ in names],
+        'type': ['allopathy'] * count,
+        'short_composition1': [f"{rng.choice(_INGREDIENTS)} ({rng.choice((250, 500))}mg)" for _ in names],
+        'short_composition2': [rng.choice(('', f"{rng.choice(_INGREDIENTS)} (125mg)")) for _ in names],
+    })
+
+
+# Spelling changes that mimic Whisper writing an unfamiliar brand by ear
+_MISHEARINGS = ((r'^x', 'z'), (r'ph', 'f'), (r'c(?=[eiy])', 's'), (r'c', 'k'),
+                (r'z', 's'), (r'x', 'ks'), (r'll', 'l'), (r'y', 'i'))
+
+
+def mishear(name):
+    """Return ``name`` with its brand word spelled the way it sounds"""
+    brand, _, rest = name.partition(' ')
+    heard = brand.lower()
+    for spelled, said in _MISHEARINGS:
+        heard = re.sub(spelled, said, heard)
+    return f"{heard} {rest}".strip()
+
+
+def transcript(names, count=3, seed=0):
+    """Return a dictation-style transcript mentioning ``count`` of ``names``"""
+    rng = random.Random(seed)
+    parts = []
+    for name in rng.sample(list(names), count):
+        parts.append(f"{name.lower()} {rng.choice(('two', '3', 'five'))} days "
+                     f"{rng.choice(('one', 'two'))} tablets {rng.choice(('before meal', 'after meal'))}")
+    return 'patient should take ' + ', then '.join(parts)
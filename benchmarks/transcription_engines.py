@@ -0,0 +1,115 @@
+"""Compare transcription engines and decoding presets on the bundled recordings.
+
+    python benchmarks/transcription_engines.py --model base
+    python benchmarks/transcription_engines.py --configs whisper:default,faster-whisper:dictation
+
+For every engine:preset pair this reports the real-time factor (RTF:
+transcription time divided by audio duration, below 1 is faster than
+real time) and word agreement with the first configuration, which serves
+as the reference (1.0 means the same words). Configurations whose library
+is not installed are reported as skipped.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rapidfuzz.distance import Levenshtein
+
+from audio_utils import SAMPLE_RATE, decode_to_pcm
+from benchmarks.run_benchmarks import AUDIO_FILES
+from transcription import create_engine
+
+DEFAULT_CONFIGS = ('whisper:default', 'whisper:dictation', 'faster-whisper:default', 'faster-whisper:dictation')
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def agreement(reference, text):
+    """1 minus the word error rate of ``text`` against ``reference``"""
+    expected = _WORD_RE.findall(reference.lower())
+    actual = _WORD_RE.findall(text.lower())
+    if not expected:
+        return 1.0 if not actual else 0.0
+    return round(max(0.0, 1 - Levenshtein.distance(expected, actual) / len(expected)), 3)
+
+
+def run_config(config, model, clips, repeat):
+    engine_name, _, preset = config.partition(':')
+    try:
+        started = time.perf_counter()
+        engine = create_engine(engine_name, model, preset or 'default')
+        load_s = time.perf_counter() - started
+    except ImportError as e:
+        return {'skipped': f'missing dependency: {e.name}'}
+
+    result = {'load_s': round(load_s, 2), 'clips': {}}
+    # Warm up once so one-time initialisation is not counted
+    engine.transcribe(next(iter(clips.values())))
+    for filename, audio in clips.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            text = engine.transcribe(audio)
+            samples.append(time.perf_counter() - started)
+        duration = len(audio) / SAMPLE_RATE
+        result['clips'][filename] = {
+            'audio_s': round(duration, 2),
+            'median_ms': round(statistics.median(samples) * 1000, 1),
+            'rtf': round(statistics.median(samples) / duration, 3),
+            'text': text.strip(),
+        }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', default=','.join(DEFAULT_CONFIGS), help='comma separated engine:preset pairs')
+    parser.add_argument('--model', default='base', help='model size for every engine')
+    parser.add_argument('--repeat', type=int, default=3, help='timed transcriptions per clip')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    try:
+        clips = {filename: decode_to_pcm(os.path.join(ROOT, filename)) for filename in AUDIO_FILES}
+    except FileNotFoundError as e:
+        # pydub raises this when FFmpeg is not installed
+        print(f'Cannot decode the recordings: {e}', file=sys.stderr)
+        return 1
+
+    results = {}
+    reference = None
+    for config in args.configs.split(','):
+        print(f'Running {config}...', file=sys.stderr)
+        result = results[config] = run_config(config, args.model, clips, args.repeat)
+        if 'skipped' in result:
+            continue
+        if reference is None:
+            reference = result
+        for filename, clip in result['clips'].items():
+            clip['agreement'] = agreement(reference['clips'][filename]['text'], clip['text'])
+
+    print(f"\n{'config':28} {'clip':45} {'RTF':>7} {'agree':>6}", file=sys.stderr)
+    for config, result in results.items():
+        if 'skipped' in result:
+            print(f"{config:28} skipped ({result['skipped']})", file=sys.stderr)
+            continue
+        for filename, clip in result['clips'].items():
+            print(f"{config:28} {filename:45} {clip['rtf']:7.3f} {clip['agreement']:6.3f}", file=sys.stderr)
+
+    output = json.dumps({'model': args.model, 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import os
+import time
+import logging
+import threading
+
+import pandas as pd
+
+from composition import CompositionIndex
+from phonetic import PhoneticIndex
+from search_index import MedicineSearchIndex
+
+logger = logging.getLogger('ai_prescriptor.catalog')
+
+
+class MedicineCatalog:
+    """Read-only view of medicines.csv shared by every session.
+
+    Built once per server process (see ``load_medicines_data`` in app.py) and
+    never mutated afterwards, so sessions can hold on to it without copying.
+    A changed CSV produces a new catalog through ``updated()``.
+    """
+
+    # Composition columns of medicines.csv
+    COMPOSITION_COLUMNS = ('short_composition1', 'short_composition2')
+    # Column identifying a row across reloads; falls back to the name
+    KEY_COLUMN = 'id'
+
+    def __init__(self, df, interactions_path=None):
+        self._interactions_path = interactions_path
+        self.composition_index = CompositionIndex()
+        if interactions_path and os.path.exists(interactions_path):
+            self.composition_index.load_interactions(interactions_path)
+        if df.empty:
+            self._df = df
+            self._row_hashes = None
+            self.names = ()
+            self._by_name = {}
+            self.phonetic_index = PhoneticIndex()
+            self.search_index = MedicineSearchIndex()
+            return
+        # Rows are indexed by their key when it is unique, which lets
+        # updated() diff a reloaded file row by row
+        key = self._key_column(df)
+        if df[key].is_unique:
+            df = df.set_index(key, drop=False)
+            self._row_hashes = _row_hashes(df)
+        else:
+            self._row_hashes = None
+        self._df = df
+        self.names = tuple(df['name'].tolist())
+        # Lower-cased name -> row label, first occurrence wins
+        self._by_name = {}
+        for label, name in zip(df.index, self.names):
+            self._by_name.setdefault(name.strip().lower(), label)
+        # Sound-alike lookup for brand names misheard by Whisper
+        self.phonetic_index = PhoneticIndex(self.names)
+        # Prefix and typo-tolerant search for manual entry
+        self.search_index = MedicineSearchIndex(self.names)
+        # Active ingredients for duplicate / interaction checks
+        self.composition_index.add_products(self._compositions(df, df.index))
+
+    @classmethod
+    def from_csv(cls, path, interactions_path=None):
+        """Load the catalog from a CSV file"""
+        return cls(pd.read_csv(path), interactions_path)
+
+    @classmethod
+    def _key_column(cls, df):
+        return cls.KEY_COLUMN if cls.KEY_COLUMN in df.columns else 'name'
+
+    def _compositions(self, df, labels):
+        """(name, compositions) pairs for the given row labels of ``df``"""
+        columns = [column for column in self.COMPOSITION_COLUMNS if column in df.columns]
+        rows = df.loc[labels, ['name'] + columns]
+        for name, *compositions in rows.itertuples(index=False, name=None):
+            yield name, compositions
+
+    def updated(self, df):
+        """Return a catalog for ``df`` (a fresh read of the CSV).
+
+        Rows are matched by key and compared by content hash; only added,
+        removed and changed rows are re-indexed, on copies of this catalog's
+        indexes, so this catalog stays valid for sessions still using it.
+        Returns ``(catalog, changes)`` where ``changes`` counts rows by kind.
+        """
+        key = self._key_column(df)
+        if self._row_hashes is None or df.empty or key not in df.columns or not df[key].is_unique:
+            catalog = MedicineCatalog(df, self._interactions_path)
+            return catalog, {'full_rebuild': len(catalog)}
+
+        df = df.set_index(key, drop=False)
+        hashes = _row_hashes(df)
+        common = self._row_hashes.index.intersection(hashes.index)
+        changed = common[self._row_hashes.loc[common].values != hashes.loc[common].values]
+        removed = self._row_hashes.index.difference(hashes.index)
+        added = hashes.index.difference(self._row_hashes.index)
+        changes = {'added': len(added), 'removed': len(removed), 'changed': len(changed)}
+        if not (len(changed) or len(removed) or len(added)):
+            return self, changes
+
+        catalog = MedicineCatalog.__new__(MedicineCatalog)
+        catalog._interactions_path = self._interactions_path
+        catalog._df = df
+        catalog._row_hashes = hashes
+        catalog.names = tuple(df['name'].tolist())
+        catalog._by_name = dict(self._by_name)
+        catalog.phonetic_index = self.phonetic_index.copy()
+        catalog.search_index = self.search_index.copy()
+        catalog.composition_index = self.composition_index.copy()
+
+        dropped = set()
+        for label in removed.append(changed):
+            name = self._df.at[label, 'name']
+            lowered = name.strip().lower()
+            if catalog._by_name.get(lowered) == label:
+                del catalog._by_name[lowered]
+            dropped.add(lowered)
+            catalog.phonetic_index.remove(name)
+            catalog.search_index.remove(name)
+            catalog.composition_index.remove(name)
+        new_labels = added.append(changed)
+        # Other rows sharing a dropped name take over its lookups
+        kept = df.index[df['name'].str.strip().str.lower().isin(dropped)].difference(new_labels)
+        for label in kept:
+            catalog._by_name.setdefault(df.at[label, 'name'].strip().lower(), label)
+        for label in new_labels:
+            name = df.at[label, 'name']
+            catalog._by_name.setdefault(name.strip().lower(), label)
+            catalog.phonetic_index.add(name)
+            catalog.search_index.add(name)
+        catalog.composition_index.add_products(self._compositions(df, kept.append(new_labels)))
+        return catalog, changes
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def empty(self):
+        return not self.names
+
+    @property
+    def df(self):
+        """The underlying DataFrame. Callers must treat it as read-only."""
+        return self._df
+
+    def search(self, query, limit=20):
+        """Top matches for a medicine name typed in the manual entry field"""
+        return self.search_index.search(query, limit)
+
+    def check_prescription(self, prescriptions):
+        """Duplicate-ingredient and interaction warnings for prescription items"""
+        return self.composition_index.check([item.medicine_name for item in prescriptions])
+
+    def get(self, name):
+        """Return the catalog row for a medicine name as a Series, or None"""
+        label = self._by_name.get(name.strip().lower())
+        if label is None:
+            return None
+        return self._df.loc[label]
+
+
+def _row_hashes(df):
+    """64-bit content hash of every row, indexed like ``df``"""
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+class CatalogStore:
+    """Holds the current catalog and swaps in a new one when the CSV changes.
+
+    ``current`` is replaced with a single assignment, so a reader always
+    sees either the old or the new catalog in full. app.py reads it once per
+    script run, which keeps each run on one consistent snapshot.
+    """
+
+    def __init__(self, path, interactions_path=None):
+        self.path = path
+        self._mtime = os.stat(path).st_mtime_ns
+        self._pending_mtime = None
+        self.current = MedicineCatalog.from_csv(path, interactions_path)
+        self._watcher = None
+
+    def reload_if_changed(self):
+        """Reload the CSV if it changed and has been stable for one poll.
+
+        Waiting one poll avoids reading a file that is still being written.
+        Returns the change counts, or None if nothing was reloaded.
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            self._pending_mtime = None
+            return None
+        if mtime != self._pending_mtime:
+            self._pending_mtime = mtime
+            return None
+        started = time.perf_counter()
+        catalog, changes = self.current.updated(pd.read_csv(self.path))
+        self.current = catalog
+        self._mtime = mtime
+        self._pending_mtime = None
+        logger.info("reloaded %s in %.0f ms: %s", self.path, (time.perf_counter() - started) * 1000, changes)
+        return changes
+
+    def watch(self, interval=2.0):
+        """Poll the CSV for changes on a background thread"""
+        if self._watcher is not None:
+            return
+
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload_if_changed()
+                except Exception:
+                    # Keep serving the last good catalog
+                    logger.exception("could not reload %s", self.path)
+
+        self._watcher = threading.Thread(target=poll, name='catalog-watcher', daemon=True)
+        self._watcher.start()
@@ -0,0 +1,151 @@
+import csv
+import re
+
+# Spelling variants found in Indian catalogs, mapped to one ingredient
+INGREDIENT_ALIASES = {
+    'amoxicillin': 'amoxycillin',
+    'acetaminophen': 'paracetamol',
+    'clavulanate': 'clavulanic acid',
+    'potassium clavulanate': 'clavulanic acid',
+    'salbutamol sulphate': 'salbutamol',
+    'cefuroxime axetil': 'cefuroxime',
+}
+
+_STRENGTH_RE = re.compile(r'\([^)]*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_ingredient(text):
+    """Reduce a composition entry such as 'Amoxycillin (500mg)' to its ingredient"""
+    if not isinstance(text, str):
+        return ''
+    name = _STRENGTH_RE.sub(' ', text.lower())
+    name = _SPACE_RE.sub(' ', name).strip(' +,.')
+    return INGREDIENT_ALIASES.get(name, name)
+
+
+class CompositionIndex:
+    """Active ingredients of every catalog product.
+
+    Ingredients get small integer IDs at load time. Each product maps to the
+    IDs it contains, each ID maps back to its products, and flagged
+    ingredient pairs live in a dict keyed by the ordered ID pair, so
+    checking a prescription of k items costs O(k^2) lookups.
+
+    After ``copy()`` both indexes share the per-ingredient product sets,
+    and each one copies a set the first time it modifies it, so updating a
+    copy never affects the original.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._ingredients = []
+        self._product_ingredients = {}
+        self._ingredient_products = {}
+        self._interactions = {}
+        # Ingredient IDs whose product set belongs to this index alone
+        self._owned = set()
+
+    def copy(self):
+        clone = CompositionIndex()
+        clone._ids = dict(self._ids)
+        clone._ingredients = list(self._ingredients)
+        clone._product_ingredients = dict(self._product_ingredients)
+        clone._ingredient_products = dict(self._ingredient_products)
+        clone._interactions = dict(self._interactions)
+        self._owned = set()
+        return clone
+
+    def _products(self, ingredient_id):
+        if ingredient_id not in self._owned:
+            self._ingredient_products[ingredient_id] = dict(self._ingredient_products.get(ingredient_id, ()))
+            self._owned.add(ingredient_id)
+        return self._ingredient_products[ingredient_id]
+
+    def ingredient_id(self, ingredient, create=False):
+        ingredient_id = self._ids.get(ingredient)
+        if ingredient_id is None and create:
+            ingredient_id = self._ids[ingredient] = len(self._ingredients)
+            self._ingredients.append(ingredient)
+        return ingredient_id
+
+    def ingredient_name(self, ingredient_id):
+        return self._ingredients[ingredient_id]
+
+    def add(self, name, compositions):
+        """Register a product with its raw composition strings"""
+        self.add_products([(name, compositions)])
+
+    def add_products(self, products):
+        """Register many (name, compositions) pairs in one pass.
+
+        Rows repeating a name add their ingredients to the existing entry.
+        """
+        for name, compositions in products:
+            ids = list(self._product_ingredients.get(name, ()))
+            for composition in compositions:
+                ingredient = normalize_ingredient(composition)
+                if ingredient:
+                    ingredient_id = self.ingredient_id(ingredient, create=True)
+                    if ingredient_id not in ids:
+                        ids.append(ingredient_id)
+            self._product_ingredients[name] = tuple(ids)
+            for ingredient_id in ids:
+                self._products(ingredient_id)[name] = None
+
+    def remove(self, name):
+        for ingredient_id in self._product_ingredients.pop(name, ()):
+            if name in self._ingredient_products.get(ingredient_id, ()):
+                del self._products(ingredient_id)[name]
+
+    def ingredients(self, name):
+        """Ingredient IDs of a product (empty if unknown)"""
+        return self._product_ingredients.get(name, ())
+
+    def products_with(self, ingredient):
+        """Products containing an ingredient, by name"""
+        ingredient_id = self.ingredient_id(normalize_ingredient(ingredient))
+        return tuple(self._ingredient_products.get(ingredient_id, ()))
+
+    def add_interaction(self, ingredient_a, ingredient_b, severity, note=''):
+        a = self.ingredient_id(normalize_ingredient(ingredient_a), create=True)
+        b = self.ingredient_id(normalize_ingredient(ingredient_b), create=True)
+        self._interactions[(min(a, b), max(a, b))] = (severity, note)
+
+    def load_interactions(self, path):
+        """Load flagged pairs from a CSV with ingredient_a, ingredient_b, severity, note"""
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                self.add_interaction(row['ingredient_a'], row['ingredient_b'],
+                                     row.get('severity', 'moderate'), row.get('note', ''))
+
+    def check(self, medicine_names):
+        """Return warnings for duplicate ingredients and flagged pairs.
+
+        Each warning is a dict with 'kind' ('duplicate' or 'interaction'),
+        the two medicine names, the ingredients involved and, for
+        interactions, 'severity' and 'note'.
+        """
+        warnings = []
+        items = [(name, self.ingredients(name)) for name in medicine_names]
+        for i, (name_a, ids_a) in enumerate(items):
+            for name_b, ids_b in items[i + 1:]:
+                shared = set(ids_a).intersection(ids_b)
+                if shared:
+                    warnings.append({
+                        'kind': 'duplicate',
+                        'medicines': (name_a, name_b),
+                        'ingredients': tuple(sorted(self._ingredients[s] for s in shared)),
+                    })
+                for a in ids_a:
+                    for b in ids_b:
+                        flagged = self._interactions.get((min(a, b), max(a, b)))
+                        if flagged and a != b:
+                            warnings.append({
+                                'kind': 'interaction',
+                                'medicines': (name_a, name_b),
+                                'ingredients': (self._ingredients[a], self._ingredients[b]),
+                                'severity': flagged[0],
+                                'note': flagged[1],
+                            })
+        return warnings
@@ -3,6 +3,14 @@ from mysql.connector import Error
 import bcrypt
 import streamlit as st
 import os
+import csv
+import json
+import functools
+import logging
+import threading
+from datetime import timedelta
+
+from metrics import timed
 
 # Database configuration - Update these values as needed
 DB_CONFIG = {
@@ -12,9 +20,33 @@ DB_CONFIG = {
     'database': 'ai_prescriptor'
 }
 
+logger = logging.getLogger('ai_prescriptor')
+
+def _locked(method):
+    """Run a DatabaseManager method while holding the manager's lock.
+    
+    Streamlit shares one manager, and so one connection, between all
+    sessions. Without the lock one session's statements, commit or rollback
+    would land in the middle of another session's transaction.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class DatabaseManager:
+    # Tables and columns written by export_table
+    EXPORT_COLUMNS = {
+        'patients': ('id', 'doctor_id', 'patient_name', 'age', 'gender', 'symptoms', 'created_at'),
+        'prescriptions': ('id', 'patient_id', 'doctor_id', 'medicine_name', 'days', 'tablets_per_day',
+                          'meal_time', 'dictation_id', 'created_at'),
+    }
+    
     def __init__(self):
         self.connection = None
+        # Reentrant: upsert_patient calls other locked methods
+        self._lock = threading.RLock()
         self.connect()
     
     def connect(self):
@@ -51,6 +83,7 @@ class DatabaseManager:
                 st.error(f"Database connection error: {e}")
             return False
     
+    @_locked
     def create_tables(self):
         """Create necessary tables if they don't exist"""
         try:
@@ -84,6 +117,31 @@ class DatabaseManager:
                 )
             """)
             
+            # Symptoms of each visit, keyed by patient and day, so a returning
+            # patient's earlier symptoms are kept (see suggester.py)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS patient_visits (
+                    patient_id INT NOT NULL,
+                    day DATE NOT NULL,
+                    symptoms TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (patient_id, day),
+                    FOREIGN KEY (patient_id) REFERENCES patients(id)
+                )
+            """)
+            
+            # Returning-patient lookup (search_patients) scans this index by
+            # name prefix within a doctor. Tables created by older versions
+            # get it here too; MySQL has no CREATE INDEX IF NOT EXISTS.
+            try:
+                cursor.execute("""
+                    CREATE INDEX idx_patients_doctor_name
+                    ON patients (doctor_id, patient_name, age, gender)
+                """)
+            except Error as e:
+                if e.errno != 1061:  # Duplicate key name: index already exists
+                    raise
+            
             # Create prescriptions table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS prescriptions (
@@ -94,18 +152,80 @@ class DatabaseManager:
                     days INT,
                     tablets_per_day INT,
                     meal_time VARCHAR(20),
+                    dictation_id INT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (patient_id) REFERENCES patients(id),
                     FOREIGN KEY (doctor_id) REFERENCES doctors(id)
                 )
             """)
             
+            # The dictation a line was taken from, for tables created before
+            # dictations were archived
+            try:
+                cursor.execute("ALTER TABLE prescriptions ADD COLUMN dictation_id INT NULL")
+            except Error as e:
+                if e.errno != 1060:  # Duplicate column name: already added
+                    raise
+            
+            # Archived dictation audio (see dictation_store.py) and its
+            # transcripts, one per engine, keyed by the audio's hash so
+            # duplicate recordings share them
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dictations (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    doctor_id INT,
+                    patient_id INT NULL,
+                    audio_hash CHAR(64) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    KEY idx_dictations_audio_hash (audio_hash),
+                    FOREIGN KEY (patient_id) REFERENCES patients(id),
+                    FOREIGN KEY (doctor_id) REFERENCES doctors(id)
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dictation_transcripts (
+                    audio_hash CHAR(64) NOT NULL,
+                    engine VARCHAR(100) NOT NULL,
+                    transcript TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (audio_hash, engine)
+                )
+            """)
+            
+            # Prescribing analytics, maintained by save_prescriptions.
+            # Reports read these instead of scanning prescriptions.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS prescribing_daily (
+                    doctor_id INT NOT NULL,
+                    day DATE NOT NULL,
+                    medicine_name VARCHAR(100) NOT NULL,
+                    prescription_count INT NOT NULL DEFAULT 0,
+                    total_days INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (doctor_id, day, medicine_name),
+                    KEY idx_prescribing_daily_day (day)
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS doctor_daily (
+                    doctor_id INT NOT NULL,
+                    day DATE NOT NULL,
+                    prescription_count INT NOT NULL DEFAULT 0,
+                    patient_count INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (doctor_id, day),
+                    KEY idx_doctor_daily_day (day)
+                )
+            """)
+            
             self.connection.commit()
             cursor.close()
             
         except Error as e:
             st.error(f"Error creating tables: {e}")
     
+    @timed('db_register_doctor')
+    @_locked
     def register_doctor(self, doctor_id, password, name, specialization="", email="", phone=""):
         """Register a new doctor"""
         try:
@@ -127,6 +247,8 @@ class DatabaseManager:
             st.error(f"Error registering doctor: {e}")
             return False
     
+    @timed('db_verify_doctor')
+    @_locked
     def verify_doctor(self, doctor_id, password):
         """Verify doctor login credentials"""
         try:
@@ -146,6 +268,8 @@ class DatabaseManager:
             st.error(f"Error verifying doctor: {e}")
             return None
     
+    @timed('db_save_patient')
+    @_locked
     def save_patient(self, doctor_id, patient_data):
         """Save patient information"""
         try:
@@ -158,35 +282,576 @@ class DatabaseManager:
                   patient_data['Gender'], patient_data['Symptoms']))
             
             patient_id = cursor.lastrowid
+            self._record_visit(cursor, patient_id, patient_data['Symptoms'])
             self.connection.commit()
             cursor.close()
             return patient_id
             
         except Error as e:
+            self.connection.rollback()
             st.error(f"Error saving patient: {e}")
             return None
     
-    def save_prescriptions(self, patient_id, doctor_id, prescriptions):
-        """Save prescriptions for a patient"""
+    @timed('db_update_patient')
+    @_locked
+    def update_patient(self, patient_id, doctor_id, patient_data):
+        """Update a returning patient's details and record today's symptoms, keeping their patient_id.
+        
+        Symptoms of earlier visits are kept in patient_visits.
+        """
+        if not self.get_patient(patient_id, doctor_id):
+            return None
         try:
             cursor = self.connection.cursor()
             
-            for prescription in prescriptions:
-                cursor.execute("""
-                    INSERT INTO prescriptions (patient_id, doctor_id, medicine_name, days, tablets_per_day, meal_time)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (patient_id, doctor_id, prescription['Medicine Name'], 
-                      prescription['Number of Days'], prescription['Tablets per Day'], 
-                      prescription['Meal Time']))
+            cursor.execute("""
+                UPDATE patients SET patient_name = %s, age = %s, gender = %s
+                WHERE id = %s AND doctor_id = %s
+            """, (patient_data['Name'], patient_data['Age'], patient_data['Gender'], patient_id, doctor_id))
+            self._record_visit(cursor, patient_id, patient_data['Symptoms'])
             
             self.connection.commit()
             cursor.close()
+            return patient_id
+            
+        except Error as e:
+            self.connection.rollback()
+            st.error(f"Error updating patient: {e}")
+            return None
+    
+    def _record_visit(self, cursor, patient_id, symptoms):
+        cursor.execute("""
+            INSERT INTO patient_visits (patient_id, day, symptoms)
+            VALUES (%s, CURRENT_DATE, %s)
+            ON DUPLICATE KEY UPDATE symptoms = VALUES(symptoms)
+        """, (patient_id, symptoms))
+    
+    @_locked
+    def upsert_patient(self, doctor_id, patient_data, patient_id=None):
+        """Update the given returning patient, or save a new one when patient_id is None"""
+        if patient_id is None:
+            return self.save_patient(doctor_id, patient_data)
+        return self.update_patient(patient_id, doctor_id, patient_data)
+    
+    @_locked
+    def get_patient(self, patient_id, doctor_id):
+        """Get one of the doctor's patients by id"""
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            
+            cursor.execute("""
+                SELECT id, patient_name, age, gender, symptoms, created_at
+                FROM patients WHERE id = %s AND doctor_id = %s
+            """, (patient_id, doctor_id))
+            
+            patient = cursor.fetchone()
+            cursor.close()
+            return patient
+            
+        except Error as e:
+            st.error(f"Error fetching patient: {e}")
+            return None
+    
+    @timed('db_search_patients')
+    @_locked
+    def search_patients(self, doctor_id, name_prefix, age=None, gender=None, limit=10):
+        """Find the doctor's patients whose name starts with name_prefix.
+        
+        Uses idx_patients_doctor_name; age and gender narrow the match.
+        """
+        # Escape LIKE wildcards so the prefix matches literally
+        prefix = name_prefix.strip().replace('!', '!!').replace('%', '!%').replace('_', '!_')
+        if not prefix:
+            return []
+        
+        query = """
+            SELECT id, patient_name, age, gender, symptoms, created_at
+            FROM patients
+            WHERE doctor_id = %s AND patient_name LIKE %s ESCAPE '!'
+        """
+        params = [doctor_id, prefix + '%']
+        if age:
+            query += " AND age = %s"
+            params.append(age)
+        if gender:
+            query += " AND gender = %s"
+            params.append(gender)
+        query += " ORDER BY patient_name, id DESC LIMIT %s"
+        params.append(limit)
+        
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute(query, params)
+            patients = cursor.fetchall()
+            cursor.close()
+            return patients
+            
+        except Error as e:
+            st.error(f"Error searching patients: {e}")
+            return []
+    
+    @timed('db_save_prescriptions')
+    @_locked
+    def save_prescriptions(self, patient_id, doctor_id, prescriptions, saved=None, changes=None):
+        """Save a patient's prescription as changes against what was saved before.
+        
+        saved maps each line_id (the prescriptions row id, see PrescriptionItem)
+        to the row last written for it; pass the same dict to every save of
+        this prescription. New lines are inserted, changed lines updated and
+        lines no longer listed deleted, in one transaction that also adjusts
+        the analytics tables. On success the new lines get their line_id and
+        saved is brought up to date. Saving an unchanged prescription sends
+        no queries.
+        
+        If changes is a list, it gets (day, visit symptoms, medicine name ->
+        lines added, negative when removed) for each visit the save changed,
+        for SymptomSuggester.update_visit.
+        """
+        if saved is None:
+            saved = {}
+        current, lines, inserts, updates = {}, {}, [], []
+        for prescription in prescriptions:
+            row = prescription.to_row() + (prescription.dictation_id,)
+            if prescription.line_id in saved and prescription.line_id not in current:
+                current[prescription.line_id] = row
+                lines[prescription.line_id] = prescription
+                if row != saved[prescription.line_id]:
+                    updates.append(prescription.line_id)
+            else:
+                inserts.append((prescription, row))
+        deletes = [line_id for line_id in saved if line_id not in current]
+        if not inserts and not updates and not deletes:
             return True
+        
+        try:
+            cursor = self.connection.cursor()
+            
+            # Analytics rows are per day, so changes to earlier lines are
+            # applied to the day they were first saved
+            days = {}
+            if updates or deletes:
+                line_ids = updates + deletes
+                cursor.execute(f"""
+                    SELECT id, DATE(created_at) FROM prescriptions
+                    WHERE patient_id = %s AND doctor_id = %s AND id IN ({', '.join(['%s'] * len(line_ids))})
+                """, [patient_id, doctor_id] + line_ids)
+                days = dict(cursor.fetchall())
+            
+            # day -> medicine name -> [prescription count, days] to add
+            deltas = {}
+            
+            def add_delta(day, row, sign):
+                counts = deltas.setdefault(day, {}).setdefault(row[0], [0, 0])
+                counts[0] += sign
+                counts[1] += sign * (row[1] or 0)
+            
+            # A line deleted elsewhere since the last save is saved again
+            stale = [line_id for line_id in updates if line_id not in days]
+            inserts += [(lines[line_id], current[line_id]) for line_id in stale]
+            updates = [line_id for line_id in updates if line_id in days]
+            deleted = [line_id for line_id in deletes if line_id in days]
+            
+            # Only inserts and deletes can change the days a patient was seen
+            counts_patients = bool(inserts or deleted)
+            if counts_patients:
+                days_before = self._prescribed_days(cursor, patient_id, doctor_id)
+            if inserts:
+                cursor.execute("SELECT CURRENT_DATE")
+                today = cursor.fetchone()[0]
+            
+            inserted = []
+            for prescription, row in inserts:
+                cursor.execute("""
+                    INSERT INTO prescriptions (patient_id, doctor_id, medicine_name, days, tablets_per_day, meal_time,
+                                               dictation_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (patient_id, doctor_id) + row)
+                inserted.append((prescription, cursor.lastrowid, row))
+                add_delta(today, row, 1)
+            
+            if updates:
+                cursor.executemany("""
+                    UPDATE prescriptions
+                    SET medicine_name = %s, days = %s, tablets_per_day = %s, meal_time = %s, dictation_id = %s
+                    WHERE id = %s
+                """, [current[line_id] + (line_id,) for line_id in updates])
+                for line_id in updates:
+                    add_delta(days[line_id], saved[line_id], -1)
+                    add_delta(days[line_id], current[line_id], 1)
+            
+            if deleted:
+                cursor.executemany("DELETE FROM prescriptions WHERE id = %s", [(line_id,) for line_id in deleted])
+                for line_id in deleted:
+                    add_delta(days[line_id], saved[line_id], -1)
+            
+            # A patient counts once per day in doctor_daily
+            patient_deltas = {}
+            if counts_patients:
+                days_after = self._prescribed_days(cursor, patient_id, doctor_id)
+                patient_deltas = {day: (day in days_after) - (day in days_before)
+                                  for day in days_before ^ days_after}
+            for day in set(deltas) | set(patient_deltas):
+                self._update_analytics(cursor, doctor_id, day, deltas.get(day, {}), patient_deltas.get(day, 0))
+            
+            # The same per-day changes, by medicine name, for the suggester
+            visit_changes = []
+            if changes is not None:
+                line_changes = {day: {name: count for name, (count, _) in medicines.items() if count}
+                                for day, medicines in deltas.items()}
+                line_changes = {day: names for day, names in line_changes.items() if names}
+                if line_changes:
+                    symptoms = self._visit_symptoms(cursor, patient_id, list(line_changes))
+                    visit_changes = [(day, symptoms[day], names) for day, names in line_changes.items()]
+            
+            self.connection.commit()
+            cursor.close()
             
         except Error as e:
+            self.connection.rollback()
             st.error(f"Error saving prescriptions: {e}")
             return False
+        
+        for line_id in deletes + stale:
+            del saved[line_id]
+        for prescription, line_id, row in inserted:
+            prescription.line_id = line_id
+            saved[line_id] = row
+        for line_id in updates:
+            saved[line_id] = current[line_id]
+        if changes is not None:
+            changes.extend(visit_changes)
+        return True
     
+    def _visit_symptoms(self, cursor, patient_id, days):
+        """Symptoms recorded for each of a patient's visit days, else the patient's"""
+        cursor.execute(f"""
+            SELECT day, symptoms FROM patient_visits
+            WHERE patient_id = %s AND day IN ({', '.join(['%s'] * len(days))})
+        """, [patient_id] + list(days))
+        symptoms = {day: text for day, text in cursor.fetchall() if text is not None}
+        if len(symptoms) < len(days):
+            cursor.execute("SELECT symptoms FROM patients WHERE id = %s", (patient_id,))
+            row = cursor.fetchone()
+            for day in days:
+                symptoms.setdefault(day, row[0] if row else None)
+        return symptoms
+    
+    def _prescribed_days(self, cursor, patient_id, doctor_id):
+        cursor.execute("""
+            SELECT DISTINCT DATE(created_at) FROM prescriptions
+            WHERE patient_id = %s AND doctor_id = %s
+        """, (patient_id, doctor_id))
+        return {day for (day,) in cursor.fetchall()}
+    
+    def _update_analytics(self, cursor, doctor_id, day, medicine_deltas, patient_delta):
+        """Apply one day's changes to the analytics tables, inside the caller's transaction.
+        
+        medicine_deltas maps a medicine name to the (prescription count, days)
+        to add; negative values undo earlier saves.
+        """
+        medicine_deltas = {name: (count, days) for name, (count, days) in medicine_deltas.items()
+                           if count or days}
+        if not medicine_deltas and not patient_delta:
+            return
+        if medicine_deltas:
+            cursor.executemany("""
+                INSERT INTO prescribing_daily (doctor_id, day, medicine_name, prescription_count, total_days)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    prescription_count = prescription_count + VALUES(prescription_count),
+                    total_days = total_days + VALUES(total_days)
+            """, [(doctor_id, day, name, count, days) for name, (count, days) in medicine_deltas.items()])
+        cursor.execute("""
+            INSERT INTO doctor_daily (doctor_id, day, prescription_count, patient_count)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                prescription_count = prescription_count + VALUES(prescription_count),
+                patient_count = patient_count + VALUES(patient_count)
+        """, (doctor_id, day, sum(count for count, _ in medicine_deltas.values()), patient_delta))
+        if any(count < 0 for count, _ in medicine_deltas.values()):
+            # Drop rows whose prescriptions were all removed, as a backfill would
+            cursor.execute("""
+                DELETE FROM prescribing_daily WHERE doctor_id = %s AND day = %s AND prescription_count <= 0
+            """, (doctor_id, day))
+            cursor.execute("""
+                DELETE FROM doctor_daily WHERE doctor_id = %s AND day = %s AND prescription_count <= 0
+            """, (doctor_id, day))
+    
+    @timed('db_backfill_analytics')
+    @_locked
+    def backfill_analytics(self):
+        """Rebuild the analytics tables from the prescriptions table.
+        
+        Runs in one transaction, so reports never see a half-built table.
+        Returns the number of (doctor, day) rows written, or None on error.
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("DELETE FROM prescribing_daily")
+            cursor.execute("DELETE FROM doctor_daily")
+            cursor.execute("""
+                INSERT INTO prescribing_daily (doctor_id, day, medicine_name, prescription_count, total_days)
+                SELECT doctor_id, DATE(created_at), medicine_name, COUNT(*), COALESCE(SUM(days), 0)
+                FROM prescriptions
+                WHERE doctor_id IS NOT NULL
+                GROUP BY doctor_id, DATE(created_at), medicine_name
+            """)
+            cursor.execute("""
+                INSERT INTO doctor_daily (doctor_id, day, prescription_count, patient_count)
+                SELECT doctor_id, DATE(created_at), COUNT(*), COUNT(DISTINCT patient_id)
+                FROM prescriptions
+                WHERE doctor_id IS NOT NULL
+                GROUP BY doctor_id, DATE(created_at)
+            """)
+            rows = cursor.rowcount
+            self.connection.commit()
+            cursor.close()
+            return rows
+            
+        except Error as e:
+            self.connection.rollback()
+            st.error(f"Error backfilling analytics: {e}")
+            return None
+    
+    @timed('db_prescribing_by_day')
+    @_locked
+    def prescribing_by_day(self, start, end, doctor_id=None):
+        """Prescription lines and patients per day between two dates (inclusive)"""
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            doctor_filter = "AND doctor_id = %s" if doctor_id is not None else ""
+            # MySQL sums INT columns as DECIMAL, which charts treat as text
+            cursor.execute(f"""
+                SELECT day, CAST(SUM(prescription_count) AS SIGNED) AS prescriptions,
+                       CAST(SUM(patient_count) AS SIGNED) AS patients
+                FROM doctor_daily
+                WHERE day BETWEEN %s AND %s {doctor_filter}
+                GROUP BY day
+                ORDER BY day
+            """, (start, end) + ((doctor_id,) if doctor_id is not None else ()))
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+            
+        except Error as e:
+            st.error(f"Error loading report: {e}")
+            return []
+    
+    @timed('db_top_medicines')
+    @_locked
+    def top_medicines(self, start, end, doctor_id=None, limit=20):
+        """Most prescribed medicines between two dates (inclusive)"""
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            doctor_filter = "AND doctor_id = %s" if doctor_id is not None else ""
+            cursor.execute(f"""
+                SELECT medicine_name, CAST(SUM(prescription_count) AS SIGNED) AS prescriptions,
+                       CAST(SUM(total_days) AS SIGNED) AS total_days
+                FROM prescribing_daily
+                WHERE day BETWEEN %s AND %s {doctor_filter}
+                GROUP BY medicine_name
+                ORDER BY prescriptions DESC
+                LIMIT %s
+            """, (start, end) + ((doctor_id,) if doctor_id is not None else ()) + (limit,))
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+            
+        except Error as e:
+            st.error(f"Error loading report: {e}")
+            return []
+    
+    @timed('db_prescribing_by_doctor')
+    @_locked
+    def prescribing_by_doctor(self, start, end):
+        """Prescription lines and patients per doctor between two dates (inclusive)"""
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT d.name AS doctor, CAST(SUM(s.prescription_count) AS SIGNED) AS prescriptions,
+                       CAST(SUM(s.patient_count) AS SIGNED) AS patients
+                FROM doctor_daily s
+                JOIN doctors d ON d.id = s.doctor_id
+                WHERE s.day BETWEEN %s AND %s
+                GROUP BY d.id, d.name
+                ORDER BY prescriptions DESC
+            """, (start, end))
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+            
+        except Error as e:
+            st.error(f"Error loading report: {e}")
+            return []
+    
+    @timed('db_export_table')
+    @_locked
+    def export_table(self, table, out, fmt='csv', doctor_id=None, start=None, end=None, chunk_size=1000):
+        """Stream a table to a text file object as CSV or JSON Lines ('jsonl').
+        
+        Rows come from an unbuffered cursor, chunk_size at a time, so memory
+        use stays flat however large the table is. start and end are
+        inclusive dates. Returns the number of rows written, or None on error.
+        """
+        columns = self.EXPORT_COLUMNS[table]
+        conditions, params = [], []
+        if doctor_id is not None:
+            conditions.append("doctor_id = %s")
+            params.append(doctor_id)
+        if start is not None:
+            conditions.append("created_at >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("created_at < %s")
+            params.append(end + timedelta(days=1))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        if fmt == 'csv':
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            write_rows = writer.writerows
+        else:
+            def write_rows(rows):
+                out.writelines(json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in rows)
+        
+        try:
+            # Unbuffered: rows stay on the server until fetched
+            cursor = self.connection.cursor(buffered=False)
+            try:
+                cursor.execute(f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY id", params)
+                count = 0
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    write_rows(rows)
+                    count += len(rows)
+                return count
+            finally:
+                cursor.close()
+            
+        except Error as e:
+            st.error(f"Error exporting {table}: {e}")
+            return None
+    
+    @timed('db_save_dictation')
+    @_locked
+    def save_dictation(self, doctor_id, patient_id, audio_hash, engine, transcript):
+        """Record an archived dictation and its transcript; returns the dictation id.
+        
+        Archiving must never hold up a prescription, so errors are logged
+        rather than shown, and None is returned.
+        """
+        try:
+            cursor = self.connection.cursor()
+            
+            cursor.execute("""
+                INSERT INTO dictations (doctor_id, patient_id, audio_hash)
+                VALUES (%s, %s, %s)
+            """, (doctor_id, patient_id, audio_hash))
+            dictation_id = cursor.lastrowid
+            self._save_transcripts(cursor, engine, [(audio_hash, transcript)])
+            
+            self.connection.commit()
+            cursor.close()
+            return dictation_id
+            
+        except Error as e:
+            self.connection.rollback()
+            logger.warning("Could not save dictation: %s", e)
+            return None
+    
+    def _save_transcripts(self, cursor, engine, transcripts):
+        cursor.executemany("""
+            INSERT INTO dictation_transcripts (audio_hash, engine, transcript)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE transcript = VALUES(transcript)
+        """, [(audio_hash, engine, transcript) for audio_hash, transcript in transcripts])
+    
+    @_locked
+    def save_transcripts(self, engine, transcripts):
+        """Store (audio_hash, transcript) pairs produced by one engine"""
+        try:
+            cursor = self.connection.cursor()
+            self._save_transcripts(cursor, engine, transcripts)
+            self.connection.commit()
+            cursor.close()
+            return True
+            
+        except Error as e:
+            self.connection.rollback()
+            st.error(f"Error saving transcripts: {e}")
+            return False
+    
+    @_locked
+    def dictation_hashes(self, engine=None, limit=None):
+        """Hashes of archived dictations, oldest first.
+        
+        With engine set, only audio that engine has not transcribed yet.
+        """
+        query = "SELECT d.audio_hash FROM dictations d"
+        params = []
+        if engine is not None:
+            query += """
+                LEFT JOIN dictation_transcripts t ON t.audio_hash = d.audio_hash AND t.engine = %s
+                WHERE t.audio_hash IS NULL
+            """
+            params.append(engine)
+        query += " GROUP BY d.audio_hash ORDER BY MIN(d.id)"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(query, params)
+            hashes = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            return hashes
+            
+        except Error as e:
+            st.error(f"Error listing dictations: {e}")
+            return None
+    
+    def symptom_history(self, chunk_size=1000):
+        """Yield ((patient_id, day), symptoms, medicine name) per prescription line, for suggester.py.
+
+        Symptoms are the visit's (patient_visits), else the patient's. Lines
+        are read chunk_size at a time, each chunk under the connection lock,
+        so other sessions' queries run in between.
+        """
+        last_id = 0
+        while True:
+            rows = self._symptom_history_chunk(last_id, chunk_size)
+            if not rows:
+                return
+            for line_id, patient_id, day, symptoms, medicine_name in rows:
+                yield (patient_id, day), symptoms, medicine_name
+            last_id = rows[-1][0]
+
+    @_locked
+    def _symptom_history_chunk(self, after_id, chunk_size):
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT pr.id, pr.patient_id, DATE(pr.created_at), COALESCE(v.symptoms, pt.symptoms),
+                       pr.medicine_name
+                FROM prescriptions pr
+                JOIN patients pt ON pt.id = pr.patient_id
+                LEFT JOIN patient_visits v ON v.patient_id = pr.patient_id AND v.day = DATE(pr.created_at)
+                WHERE pr.id > %s
+                ORDER BY pr.id
+                LIMIT %s
+            """, (after_id, chunk_size))
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+
+        except Error as e:
+            st.error(f"Error reading prescription history: {e}")
+            return []
+
+    @_locked
     def close_connection(self):
         """Close database connection"""
         if self.connection and self.connection.is_connected():
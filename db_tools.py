@@ -0,0 +1,115 @@
+"""Maintenance commands for the AI Prescriptor database.
+
+    python db_tools.py backfill-analytics
+    python db_tools.py export prescriptions --format jsonl --from 2025-01-01 --output rx.jsonl.gz
+    python db_tools.py reprocess-dictations --engine faster-whisper --model small --preset dictation
+
+Uses the connection settings in database_config.DB_CONFIG.
+"""
+import argparse
+import datetime
+import gzip
+import sys
+
+from database_config import DatabaseManager
+from dictation_store import DictationStore
+from transcription import DECODING_PRESETS, ENGINES, TRANSCRIPTION_CONFIG
+
+
+def backfill_analytics(db_manager, args):
+    """Rebuild the reporting tables from existing prescriptions"""
+    rows = db_manager.backfill_analytics()
+    if rows is None:
+        return 1
+    print(f"Analytics rebuilt: {rows} doctor-day rows")
+    return 0
+
+
+def export(db_manager, args):
+    """Stream patients or prescriptions to CSV or JSON Lines"""
+    compress = args.gzip or args.output.endswith('.gz')
+    if args.output == '-':
+        out = gzip.open(sys.stdout.buffer, 'wt', newline='') if compress else sys.stdout
+    else:
+        out = gzip.open(args.output, 'wt', newline='') if compress else open(args.output, 'w', newline='')
+    try:
+        rows = db_manager.export_table(args.table, out, args.format, args.doctor_id,
+                                       args.start, args.end, args.chunk_size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if rows is None:
+        return 1
+    print(f"Exported {rows} {args.table} rows", file=sys.stderr)
+    return 0
+
+
+def reprocess_dictations(db_manager, args):
+    """Transcribe archived dictation audio again with another engine, model or preset"""
+    from audio_utils import decode_to_pcm
+    from transcription import create_engine
+
+    engine = create_engine(args.engine, args.model, args.preset)
+    hashes = db_manager.dictation_hashes(None if args.all else engine.label, args.limit)
+    if hashes is None:
+        return 1
+    store = DictationStore(args.archive)
+    missing = [audio_hash for audio_hash in hashes if audio_hash not in store]
+    for audio_hash in missing:
+        print(f"Audio {audio_hash} is not in {store.root}; skipped", file=sys.stderr)
+    hashes = [audio_hash for audio_hash in hashes if audio_hash in store]
+
+    done = 0
+    for start in range(0, len(hashes), args.batch_size):
+        batch = hashes[start:start + args.batch_size]
+        texts = engine.transcribe_batch([decode_to_pcm(store.path(audio_hash)) for audio_hash in batch])
+        if not db_manager.save_transcripts(engine.label, zip(batch, texts)):
+            return 1
+        done += len(batch)
+        print(f"{done}/{len(hashes)} dictations transcribed with {engine.label}", file=sys.stderr)
+    return 1 if missing else 0
+
+
+COMMANDS = {
+    'backfill-analytics': backfill_analytics,
+    'export': export,
+    'reprocess-dictations': reprocess_dictations,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('backfill-analytics', help=backfill_analytics.__doc__)
+    export_parser = subparsers.add_parser('export', help=export.__doc__)
+    export_parser.add_argument('table', choices=sorted(DatabaseManager.EXPORT_COLUMNS))
+    export_parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    export_parser.add_argument('--output', default='-', help="file to write, or '-' for stdout")
+    export_parser.add_argument('--gzip', action='store_true', help='compress the output (implied by a .gz name)')
+    export_parser.add_argument('--doctor-id', type=int, help='only rows of this doctor (doctors.id)')
+    export_parser.add_argument('--from', dest='start', type=datetime.date.fromisoformat, help='first day, YYYY-MM-DD')
+    export_parser.add_argument('--to', dest='end', type=datetime.date.fromisoformat, help='last day, YYYY-MM-DD')
+    export_parser.add_argument('--chunk-size', type=int, default=1000, help='rows fetched per round trip')
+    reprocess_parser = subparsers.add_parser('reprocess-dictations', help=reprocess_dictations.__doc__)
+    reprocess_parser.add_argument('--engine', default=TRANSCRIPTION_CONFIG['engine'], choices=sorted(ENGINES))
+    reprocess_parser.add_argument('--model', default=TRANSCRIPTION_CONFIG['model'])
+    reprocess_parser.add_argument('--preset', default=TRANSCRIPTION_CONFIG['preset'], choices=sorted(DECODING_PRESETS))
+    reprocess_parser.add_argument('--all', action='store_true',
+                                  help='also redo audio this engine has transcribed before')
+    reprocess_parser.add_argument('--limit', type=int, help='at most this many recordings')
+    reprocess_parser.add_argument('--batch-size', type=int, default=8, help='recordings per transcribe_batch call')
+    reprocess_parser.add_argument('--archive', help='archive directory (default: AI_PRESCRIPTOR_AUDIO_ARCHIVE)')
+    args = parser.parse_args(argv)
+
+    db_manager = DatabaseManager()
+    if not db_manager.connection or not db_manager.connection.is_connected():
+        print("Could not connect to the database; check DB_CONFIG in database_config.py", file=sys.stderr)
+        return 1
+    try:
+        return COMMANDS[args.command](db_manager, args)
+    finally:
+        db_manager.close_connection()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
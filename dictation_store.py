@@ -0,0 +1,74 @@
+"""Content-addressed archive of dictation audio.
+
+Each uploaded or recorded dictation is stored once, under the SHA-256 of
+the original file, as 16 kHz mono Opus (what Whisper reads, at a small
+fraction of the WAV size):
+
+    audio_archive/3f/a2/3fa2...e9.opus
+
+Sending the same file again stores nothing new. The database links each
+dictation to its patient and prescription rows and keeps its transcripts
+(see DatabaseManager.save_dictation), so archived audio can be
+transcribed again with a newer model: ``python db_tools.py reprocess-dictations``.
+Encoding needs FFmpeg with libopus.
+"""
+import hashlib
+import io
+import os
+import tempfile
+
+import metrics
+
+# Archive configuration - set through environment variables.
+# An empty path turns archiving off.
+ARCHIVE_CONFIG = {
+    'path': os.environ.get('AI_PRESCRIPTOR_AUDIO_ARCHIVE', 'audio_archive'),
+    'bitrate': os.environ.get('AI_PRESCRIPTOR_AUDIO_ARCHIVE_BITRATE', '24k'),
+}
+
+SAMPLE_RATE = 16000
+
+
+def audio_hash(data):
+    """Content address of an audio file's bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class DictationStore:
+    """Opus files in a directory tree keyed by content hash"""
+
+    def __init__(self, root=None, bitrate=None):
+        self.root = root or ARCHIVE_CONFIG['path']
+        self.bitrate = bitrate or ARCHIVE_CONFIG['bitrate']
+
+    def path(self, key):
+        """Where the audio with this hash is (or would be) stored"""
+        return os.path.join(self.root, key[:2], key[2:4], f'{key}.opus')
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, data, format=None):
+        """Store an audio file's bytes unless already present; returns its hash"""
+        from pydub import AudioSegment
+
+        key = audio_hash(data)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        with metrics.timer('dictation_archive'):
+            audio = AudioSegment.from_file(io.BytesIO(data), format=format)
+            audio = audio.set_frame_rate(SAMPLE_RATE).set_channels(1)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Encode next to the target and rename, so a crash never leaves
+            # a partial file under a valid hash
+            fd, temp_path = tempfile.mkstemp(suffix='.opus.tmp', dir=os.path.dirname(path))
+            os.close(fd)
+            try:
+                audio.export(temp_path, format='ogg', codec='libopus', bitrate=self.bitrate,
+                             parameters=['-application', 'voip'])
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        return key
@@ -0,0 +1,215 @@
+"""Shared local transcription service.
+
+One process holds the Whisper model for every Streamlit worker and
+batches requests that arrive close together, instead of each worker
+loading its own model and transcribing one dictation at a time:
+
+    python inference_service.py --model base --max-batch-size 8 --max-wait-ms 50
+    python inference_service.py --engine faster-whisper --preset dictation
+
+app.py uses the service when AI_PRESCRIPTOR_INFERENCE_ADDR is set, e.g.
+``127.0.0.1:8765`` or ``unix:/tmp/ai_prescriptor_inference.sock``.
+
+Larger ``--max-batch-size`` / ``--max-wait-ms`` raise throughput under
+load at the cost of up to ``max-wait-ms`` extra latency per request.
+
+Wire format (both directions): a 4-byte big-endian length, then a JSON
+header. Requests are followed by ``samples`` little-endian float32 PCM
+samples at 16 kHz mono.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+from transcription import DECODING_PRESETS, ENGINES, TRANSCRIPTION_CONFIG, create_engine
+
+# Inference service configuration - set through environment variables
+INFERENCE_CONFIG = {
+    'address': os.environ.get('AI_PRESCRIPTOR_INFERENCE_ADDR', ''),
+    'timeout': float(os.environ.get('AI_PRESCRIPTOR_INFERENCE_TIMEOUT', '300')),
+}
+
+logger = logging.getLogger('ai_prescriptor.inference')
+
+_LENGTH = struct.Struct('>I')
+
+
+def _parse_address(address):
+    """Return (socket family, address) for 'host:port' or 'unix:/path'"""
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError('connection closed by peer')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _send_message(sock, header, payload=b''):
+    data = json.dumps(header).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(data)) + data + payload)
+
+
+def _recv_header(sock):
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+# --- Client ---
+
+def transcribe_remote(audio, address=None, timeout=None):
+    """Transcribe 16 kHz mono float32 samples through the inference service"""
+    family, target = _parse_address(address or INFERENCE_CONFIG['address'])
+    samples = np.ascontiguousarray(audio, dtype='<f4')
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout or INFERENCE_CONFIG['timeout'])
+        sock.connect(target)
+        _send_message(sock, {'samples': len(samples)}, samples.tobytes())
+        response = _recv_header(sock)
+    if 'error' in response:
+        raise RuntimeError(f"Inference service error: {response['error']}")
+    return response['text']
+
+
+# --- Server ---
+
+class _Request:
+    __slots__ = ('audio', 'done', 'text', 'error')
+
+    def __init__(self, audio):
+        self.audio = audio
+        self.done = threading.Event()
+        self.text = None
+        self.error = None
+
+
+class DynamicBatcher:
+    """Groups requests from many connections into batched model calls.
+
+    The first request of a batch waits at most ``max_wait_ms`` for others
+    to join, and a batch never grows beyond ``max_batch_size``.
+    """
+
+    def __init__(self, transcribe_batch, max_batch_size=8, max_wait_ms=50):
+        self._transcribe_batch = transcribe_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name='inference-batcher', daemon=True).start()
+
+    def submit(self, audio):
+        """Queue one request and block until its transcript is ready"""
+        request = _Request(audio)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise RuntimeError(request.error)
+        return request.text
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                texts = self._transcribe_batch([request.audio for request in batch])
+                for request, text in zip(batch, texts):
+                    request.text = text
+            except Exception as e:
+                for request in batch:
+                    request.error = str(e)
+            finally:
+                for request in batch:
+                    request.done.set()
+            logger.info("batch of %d transcribed in %.0f ms", len(batch), (time.perf_counter() - started) * 1000)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            header = _recv_header(self.request)
+            payload = _recv_exact(self.request, header['samples'] * 4)
+            audio = np.frombuffer(payload, dtype='<f4').astype(np.float32)
+            _send_message(self.request, {'text': self.server.batcher.submit(audio)})
+        except Exception as e:
+            logger.exception("inference request failed")
+            try:
+                _send_message(self.request, {'error': str(e)})
+            except OSError:
+                pass
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def make_server(address, batcher):
+    """Create (but do not start) a server bound to ``address``"""
+    family, target = _parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.unlink(target)
+        server = _UnixServer(target, _Handler)
+    else:
+        server = _TCPServer(target, _Handler)
+    server.batcher = batcher
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--address', default=INFERENCE_CONFIG['address'] or '127.0.0.1:8765',
+                        help="'host:port' or 'unix:/path/to.sock'")
+    parser.add_argument('--engine', default=TRANSCRIPTION_CONFIG['engine'], choices=sorted(ENGINES))
+    parser.add_argument('--model', default=TRANSCRIPTION_CONFIG['model'], help='Whisper model name')
+    parser.add_argument('--preset', default=TRANSCRIPTION_CONFIG['preset'], choices=sorted(DECODING_PRESETS))
+    parser.add_argument('--max-batch-size', type=int, default=8)
+    parser.add_argument('--max-wait-ms', type=float, default=50)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    engine = create_engine(args.engine, args.model, args.preset)
+    batcher = DynamicBatcher(engine.transcribe_batch, args.max_batch_size, args.max_wait_ms)
+    server = make_server(args.address, batcher)
+    logger.info("serving %s %s (%s preset) on %s (batch <= %d, wait <= %g ms)",
+                args.engine, args.model, args.preset, args.address, args.max_batch_size, args.max_wait_ms)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
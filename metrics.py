@@ -0,0 +1,218 @@
+import os
+import time
+import bisect
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metrics configuration - set through environment variables
+METRICS_CONFIG = {
+    'enabled': os.environ.get('AI_PRESCRIPTOR_METRICS', '0') == '1',
+    'host': os.environ.get('AI_PRESCRIPTOR_METRICS_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('AI_PRESCRIPTOR_METRICS_PORT', '9108')),
+    # Doctor IDs (the login ID, not the row id) allowed to see the sidebar panel
+    'admin_doctor_ids': {
+        doctor_id.strip()
+        for doctor_id in os.environ.get('AI_PRESCRIPTOR_METRICS_ADMINS', '').split(',')
+        if doctor_id.strip()
+    },
+}
+
+# Latency buckets in seconds, from fast lookups up to long transcriptions
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus style"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf overflow slot
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class MetricsRegistry:
+    """Process-wide store of operation latencies, counters and gauges"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._errors = {}
+        self._gauges = {}
+
+    def observe(self, operation, seconds, error=False):
+        with self._lock:
+            histogram = self._histograms.get(operation)
+            if histogram is None:
+                histogram = self._histograms[operation] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                self._errors[operation] = self._errors.get(operation, 0) + 1
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def summary(self):
+        """Per-operation count, error count and latency figures in milliseconds"""
+        with self._lock:
+            rows = []
+            for operation, histogram in sorted(self._histograms.items()):
+                rows.append({
+                    'operation': operation,
+                    'count': histogram.count,
+                    'errors': self._errors.get(operation, 0),
+                    'mean_ms': round(histogram.total / histogram.count * 1000, 2),
+                    'p50_ms': histogram.quantile(0.5) * 1000,
+                    'p95_ms': histogram.quantile(0.95) * 1000,
+                })
+            return rows
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP ai_prescriptor_operation_seconds Latency of instrumented operations.',
+            '# TYPE ai_prescriptor_operation_seconds histogram',
+        ]
+        with self._lock:
+            for operation, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'ai_prescriptor_operation_seconds_bucket{{operation="{operation}",le="{bound}"}} {cumulative}')
+                lines.append(f'ai_prescriptor_operation_seconds_bucket{{operation="{operation}",le="+Inf"}} {histogram.count}')
+                lines.append(f'ai_prescriptor_operation_seconds_sum{{operation="{operation}"}} {histogram.total}')
+                lines.append(f'ai_prescriptor_operation_seconds_count{{operation="{operation}"}} {histogram.count}')
+            lines.append('# HELP ai_prescriptor_operation_errors_total Instrumented operations that raised.')
+            lines.append('# TYPE ai_prescriptor_operation_errors_total counter')
+            for operation, errors in sorted(self._errors.items()):
+                lines.append(f'ai_prescriptor_operation_errors_total{{operation="{operation}"}} {errors}')
+            previous = None
+            for (name, labels), value in sorted(self._gauges.items()):
+                if name != previous:
+                    lines.append(f'# TYPE ai_prescriptor_{name} gauge')
+                    previous = name
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels)
+                lines.append(f'ai_prescriptor_{name}{{{label_text}}} {value}' if labels else f'ai_prescriptor_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def enabled():
+    return METRICS_CONFIG['enabled']
+
+
+class _Timer:
+    __slots__ = ('operation', 'started')
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        registry.observe(self.operation, time.perf_counter() - self.started, error=exc_type is not None)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(operation):
+    """Context manager recording how long the block takes.
+
+    Returns a shared no-op object when metrics are disabled.
+    """
+    if not METRICS_CONFIG['enabled']:
+        return _NULL_TIMER
+    return _Timer(operation)
+
+
+def timed(operation):
+    """Decorator recording the latency of every call.
+
+    When metrics are disabled the function is returned unwrapped, so
+    instrumented code pays nothing.
+    """
+    def decorator(func):
+        if not METRICS_CONFIG['enabled']:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server():
+    """Serve /metrics on the configured local port. Safe to call repeatedly."""
+    global _server
+    if not METRICS_CONFIG['enabled']:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((METRICS_CONFIG['host'], METRICS_CONFIG['port']), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server
+
+
+def is_admin(doctor):
+    """Whether a logged-in doctor may see the metrics panel"""
+    return bool(doctor) and doctor.get('doctor_id') in METRICS_CONFIG['admin_doctor_ids']
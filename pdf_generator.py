@@ -0,0 +1,64 @@
+from fpdf import FPDF
+from datetime import datetime
+
+from metrics import timed
+
+
+class PDF(FPDF):
+    def header(self):
+        self.set_font('Helvetica', 'B', 15)
+        self.cell(0, 10, 'AI Prescriptor - Medical Prescription', 0, 1, 'C')
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Helvetica', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+        self.set_y(-30)
+        self.set_font('Helvetica', 'I', 10)
+        self.cell(0, 10, 'Doctor\'s Signature: ___________________', 0, 1, 'R')
+
+
+@timed('pdf_render')
+def create_prescription_pdf(patient_info, prescriptions, doctor_info):
+    """Render a prescription as PDF bytes"""
+    pdf = PDF('P', 'mm', 'A4')
+    pdf.add_page()
+
+    # Header with doctor info
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 10, f"Dr. {doctor_info['name']}", 0, 1, 'R')
+    if doctor_info.get('specialization'):
+        pdf.set_font('Helvetica', '', 10)
+        pdf.cell(0, 8, f"Specialization: {doctor_info['specialization']}", 0, 1, 'R')
+    pdf.ln(5)
+
+    # Patient Info
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 10, 'Patient Information', 0, 1, 'L')
+    pdf.set_font('Helvetica', '', 11)
+    pdf.cell(0, 8, f"Name: {patient_info['Name']}", 0, 1, 'L')
+    pdf.cell(0, 8, f"Age: {patient_info['Age']} / Gender: {patient_info['Gender']}", 0, 1, 'L')
+    pdf.cell(0, 8, f"Date: {datetime.now().strftime('%Y-%m-%d')}", 0, 1, 'L')
+    if patient_info.get('Symptoms'):
+        pdf.cell(0, 8, f"Symptoms: {patient_info['Symptoms']}", 0, 1, 'L')
+    pdf.ln(10)
+
+    # Prescription Table Header
+    pdf.set_font('Helvetica', 'B', 11)
+    pdf.set_fill_color(230, 230, 230)
+    col_widths = {'Medicine': 60, 'Days': 20, 'Dosage/Day': 25, 'Timing': 40}
+    pdf.cell(col_widths['Medicine'], 10, 'Medicine Name', 1, 0, 'C', True)
+    pdf.cell(col_widths['Days'], 10, 'Days', 1, 0, 'C', True)
+    pdf.cell(col_widths['Dosage/Day'], 10, 'Dosage/Day', 1, 0, 'C', True)
+    pdf.cell(col_widths['Timing'], 10, 'Timing', 1, 1, 'C', True)
+
+    # Prescription Table Rows
+    pdf.set_font('Helvetica', '', 10)
+    for p in prescriptions:
+        pdf.cell(col_widths['Medicine'], 10, p.medicine_name, 1, 0, 'L')
+        pdf.cell(col_widths['Days'], 10, str(p.days), 1, 0, 'C')
+        pdf.cell(col_widths['Dosage/Day'], 10, str(p.dosage_per_day), 1, 0, 'C')
+        pdf.cell(col_widths['Timing'], 10, p.meal_time, 1, 1, 'L')
+
+    return bytes(pdf.output())
@@ -0,0 +1,180 @@
+import re
+
+# Longest key kept; longer keys make the index more selective but less
+# forgiving of endings Whisper tends to garble
+MAX_KEY_LENGTH = 6
+
+_VOWELS = set('aeiou')
+_FRONT_VOWELS = set('eiy')
+_WORD_RE = re.compile(r'[a-z]+')
+
+# Word beginnings with a silent first letter
+_SILENT_STARTS = ('kn', 'gn', 'pn', 'ae', 'wr', 'ps')
+
+# Transcript words that never start a medicine name
+STOPWORDS = {
+    'the', 'and', 'for', 'take', 'tablet', 'tablets', 'capsule', 'capsules', 'days', 'day',
+    'times', 'daily', 'before', 'after', 'meal', 'meals', 'morning', 'night', 'evening',
+    'afternoon', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+    'then', 'with', 'twice', 'once', 'patient', 'should', 'give', 'syrup', 'dose', 'per',
+}
+
+
+def phonetic_key(word):
+    """Return a Metaphone-style sound key for a single word.
+
+    Spellings that sound alike map to the same key, e.g. 'crocin' and
+    'krosin' both give 'KRSN', 'zyrtec' and 'sirtek' both give 'SRTK'.
+    """
+    word = ''.join(_WORD_RE.findall(word.lower()))
+    if not word:
+        return ''
+    if word.startswith(_SILENT_STARTS):
+        word = word[1:]
+    elif word.startswith('x'):
+        word = 's' + word[1:]
+    elif word.startswith('wh'):
+        word = 'w' + word[2:]
+
+    key = []
+    i = 0
+    length = len(word)
+    while i < length:
+        char = word[i]
+        nxt = word[i + 1] if i + 1 < length else ''
+        code = ''
+        step = 1
+        if char in _VOWELS:
+            # Vowels only matter at the start of a word
+            code = 'A' if i == 0 else ''
+        elif char == 'c':
+            if nxt == 'h':
+                code, step = 'X', 2
+            elif nxt == 'k':
+                code, step = 'K', 2
+            else:
+                code = 'S' if nxt in _FRONT_VOWELS else 'K'
+        elif char == 'g':
+            if nxt == 'h':
+                code, step = '', 2
+            else:
+                code = 'J' if nxt in _FRONT_VOWELS else 'K'
+        elif char == 'p':
+            code, step = ('F', 2) if nxt == 'h' else ('P', 1)
+        elif char == 's':
+            code, step = ('X', 2) if nxt == 'h' else ('S', 1)
+        elif char == 't':
+            if nxt == 'h':
+                # Drug names use 'th' as a hard T (methotrexate, ethambutol)
+                code, step = 'T', 2
+            elif word[i + 1:i + 3] in ('io', 'ia'):
+                code = 'X'
+            else:
+                code = 'T'
+        elif char == 'd':
+            code, step = ('J', 2) if nxt == 'g' else ('T', 1)
+        elif char == 'q':
+            code, step = ('K', 2) if nxt == 'u' else ('K', 1)
+        elif char == 'x':
+            # Emit K then S so 'x' and a spelled-out 'ks' give the same key
+            if not (key and key[-1] == 'K'):
+                key.append('K')
+            code = 'S'
+        elif char == 'z':
+            code = 'S'
+        elif char == 'v':
+            code = 'F'
+        elif char == 'b':
+            code = 'P'
+        elif char in 'wy':
+            # Semi-vowels only count before a vowel
+            code = char.upper() if nxt in _VOWELS else ''
+        elif char == 'h':
+            code = 'H' if nxt in _VOWELS and (i == 0 or word[i - 1] not in _VOWELS) else ''
+        else:
+            code = char.upper()
+        # Collapse repeated sounds ('ll', 'ss', 'cc')
+        if code and not (key and key[-1] == code):
+            key.append(code)
+        i += step
+    return ''.join(key)[:MAX_KEY_LENGTH]
+
+
+class PhoneticIndex:
+    """Hash index from the sound of a medicine's brand word to catalog names.
+
+    Buckets map each name to the number of catalog rows carrying it. After
+    ``copy()`` both indexes share their buckets, and each one copies a
+    bucket the first time it modifies it, so updating a copy never affects
+    the original and costs one bucket copy per touched key.
+    """
+
+    def __init__(self, names=()):
+        self._index = {}
+        # Keys whose bucket belongs to this index alone
+        self._owned = set()
+        for name in names:
+            self.add(name)
+
+    def copy(self):
+        clone = PhoneticIndex()
+        clone._index = dict(self._index)
+        self._owned = set()
+        return clone
+
+    def _bucket(self, key):
+        if key not in self._owned:
+            self._index[key] = dict(self._index.get(key, ()))
+            self._owned.add(key)
+        return self._index[key]
+
+    @staticmethod
+    def brand(name):
+        """The first word of a medicine name, which is what gets dictated"""
+        words = _WORD_RE.findall(name.lower())
+        return words[0] if words else ''
+
+    def add(self, name):
+        key = phonetic_key(self.brand(name))
+        if key:
+            bucket = self._bucket(key)
+            bucket[name] = bucket.get(name, 0) + 1
+
+    def remove(self, name):
+        key = phonetic_key(self.brand(name))
+        if name not in self._index.get(key, ()):
+            return
+        bucket = self._bucket(key)
+        if bucket[name] > 1:
+            bucket[name] -= 1
+        else:
+            del bucket[name]
+        if not bucket:
+            del self._index[key]
+            self._owned.discard(key)
+
+    def lookup(self, word):
+        """Catalog names whose brand word sounds like ``word``"""
+        return self._index.get(phonetic_key(word), ())
+
+    def __len__(self):
+        return len(self._index)
+
+
+def transcript_tokens(text_lower):
+    """Yield (word, start) pairs worth looking up from a lower-cased transcript.
+
+    Adjacent words are also joined, since Whisper often splits an unfamiliar
+    brand name in two ('ogment in' for 'augmentin').
+    """
+    previous = None
+    for match in _WORD_RE.finditer(text_lower):
+        word = match.group()
+        if word in STOPWORDS:
+            previous = None
+            continue
+        if len(word) >= 3:
+            yield word, match.start()
+        if previous is not None:
+            yield previous[0] + word, previous[1]
+        previous = (word, match.start())
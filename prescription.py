@@ -0,0 +1,71 @@
+MEAL_TIMES = ('After Meal', 'Before Meal')
+
+# Column headers used wherever a prescription is shown as a table
+DISPLAY_COLUMNS = ('Medicine Name', 'Number of Days', 'Dosage per Day', 'Meal Time')
+
+
+class PrescriptionItem:
+    """A single medicine line on a prescription.
+
+    Items live in ``st.session_state`` for every open session, so the class
+    uses ``__slots__`` instead of a per-instance ``__dict__``.
+    """
+
+    __slots__ = ('medicine_name', 'days', 'dosage_per_day', 'meal_time', 'dictation_id', 'line_id')
+
+    def __init__(self, medicine_name, days=1, dosage_per_day=1, meal_time='After Meal', dictation_id=None,
+                 line_id=None):
+        self.medicine_name = medicine_name
+        self.days = int(days)
+        self.dosage_per_day = int(dosage_per_day)
+        self.meal_time = meal_time
+        # The archived dictation the line was taken from, if any, and the
+        # database row it was saved as (see save_prescriptions); neither is
+        # part of to_row
+        self.dictation_id = dictation_id
+        self.line_id = line_id
+
+    def __repr__(self):
+        return (f"PrescriptionItem({self.medicine_name!r}, days={self.days}, "
+                f"dosage_per_day={self.dosage_per_day}, meal_time={self.meal_time!r})")
+
+    def __eq__(self, other):
+        if not isinstance(other, PrescriptionItem):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def summary(self):
+        """One-line description used in suggestion lists"""
+        return f"{self.medicine_name} - {self.days} days, {self.dosage_per_day} per day, {self.meal_time}"
+
+    def to_row(self):
+        """Return the item as a plain tuple (the database column order)"""
+        return (self.medicine_name, self.days, self.dosage_per_day, self.meal_time)
+
+    @classmethod
+    def from_row(cls, row):
+        """Build an item from a tuple produced by ``to_row``"""
+        return cls(*row)
+
+    def to_dict(self):
+        """Return the item keyed by the display column names"""
+        return dict(zip(DISPLAY_COLUMNS, self.to_row()))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an item from a display-keyed dict.
+
+        Accepts the old 'Tablets per Day' key as an alias for 'Dosage per Day'.
+        """
+        dosage = data.get('Dosage per Day', data.get('Tablets per Day', 1))
+        return cls(data['Medicine Name'], data.get('Number of Days', 1),
+                   dosage, data.get('Meal Time', 'After Meal'))
+
+
+def to_table(items):
+    """Return prescription items as column lists, ready for ``pd.DataFrame``"""
+    columns = {name: [] for name in DISPLAY_COLUMNS}
+    for item in items:
+        for name, value in zip(DISPLAY_COLUMNS, item.to_row()):
+            columns[name].append(value)
+    return columns
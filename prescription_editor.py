@@ -0,0 +1,45 @@
+import streamlit as st
+import pandas as pd
+
+from prescription import MEAL_TIMES, to_table
+
+REMOVE_COLUMN = 'Remove'
+
+
+def render_prescription_editor(prescriptions, key='prescription_editor'):
+    """Show the prescription list as a single editable grid.
+
+    Edits are batched inside a form and written back to ``prescriptions``
+    in one go when the doctor applies them. Returns True when edits were applied.
+    """
+    table = to_table(prescriptions)
+    table[REMOVE_COLUMN] = [False] * len(prescriptions)
+    with st.form(f'{key}_form', border=False):
+        edited = st.data_editor(
+            pd.DataFrame(table),
+            key=key,
+            hide_index=True,
+            width='stretch',
+            disabled=['Medicine Name'],
+            column_config={
+                'Number of Days': st.column_config.NumberColumn(min_value=1, max_value=30, step=1, required=True),
+                'Dosage per Day': st.column_config.NumberColumn(min_value=1, max_value=10, step=1, required=True),
+                'Meal Time': st.column_config.SelectboxColumn(options=MEAL_TIMES, required=True),
+                REMOVE_COLUMN: st.column_config.CheckboxColumn(),
+            },
+        )
+        apply_changes = st.form_submit_button('Apply Changes')
+
+    if not apply_changes:
+        return False
+    # Rows stay in the same order as ``prescriptions`` (the grid is fixed-size)
+    kept = []
+    for item, row in zip(prescriptions, edited.to_dict('records')):
+        if row[REMOVE_COLUMN]:
+            continue
+        item.days = int(row['Number of Days'])
+        item.dosage_per_day = int(row['Dosage per Day'])
+        item.meal_time = row['Meal Time']
+        kept.append(item)
+    prescriptions[:] = kept
+    return True
@@ -0,0 +1,47 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+import metrics
+
+# Default report window in days
+DEFAULT_REPORT_DAYS = 30
+
+def show_reports_page(db_manager, doctor):
+    """Display prescribing reports read from the analytics tables"""
+    st.title("📊 Prescribing Reports")
+
+    # Admins (AI_PRESCRIPTOR_METRICS_ADMINS) see the whole clinic, other doctors their own figures
+    clinic_wide = metrics.is_admin(doctor)
+    if clinic_wide:
+        scope = st.radio("Scope", ["My prescriptions", "All doctors"], horizontal=True)
+        clinic_wide = scope == "All doctors"
+    doctor_id = None if clinic_wide else doctor['id']
+
+    today = datetime.date.today()
+    selected = st.date_input("Date range", (today - datetime.timedelta(days=DEFAULT_REPORT_DAYS), today))
+    if len(selected) != 2:
+        st.info("Select an end date.")
+        return
+    start, end = selected
+
+    by_day = pd.DataFrame(db_manager.prescribing_by_day(start, end, doctor_id))
+    if by_day.empty:
+        st.info("No prescriptions in this period. Run `python db_tools.py backfill-analytics` "
+                "if prescriptions were saved before reports were enabled.")
+        return
+
+    col1, col2 = st.columns(2)
+    col1.metric("Prescription lines", int(by_day['prescriptions'].sum()))
+    col2.metric("Patient visits", int(by_day['patients'].sum()))
+
+    st.subheader("Per day")
+    st.line_chart(by_day.set_index('day')[['prescriptions', 'patients']])
+
+    st.subheader("Top medicines")
+    st.dataframe(pd.DataFrame(db_manager.top_medicines(start, end, doctor_id)), hide_index=True)
+
+    if clinic_wide:
+        st.subheader("Per doctor")
+        st.dataframe(pd.DataFrame(db_manager.prescribing_by_doctor(start, end)), hide_index=True)
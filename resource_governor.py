@@ -0,0 +1,152 @@
+"""Limits on CPU-heavy work shared by all sessions of a server process.
+
+Each workload (local transcription, prescription extraction, PDF
+rendering, dictation archiving) has a number of slots that can run at once and a bounded
+queue of callers waiting for one. Waiting callers are served in arrival
+order. When the queue is full, new callers are turned away with
+WorkloadBusy instead of piling more work onto saturated cores.
+
+    with resource_governor.slot('pdf', on_wait=show_position):
+        create_prescription_pdf(...)
+"""
+import collections
+import contextlib
+import os
+import threading
+
+import metrics
+
+_CPUS = os.cpu_count() or 1
+
+# Slots and queue lengths per workload - set through environment variables.
+# One local Whisper transcription already uses every core, so by default
+# only one runs at a time.
+GOVERNOR_CONFIG = {
+    'transcribe': {
+        'concurrency': int(os.environ.get('AI_PRESCRIPTOR_TRANSCRIBE_CONCURRENCY', '1')),
+        'queue': int(os.environ.get('AI_PRESCRIPTOR_TRANSCRIBE_QUEUE', '8')),
+    },
+    'extract': {
+        'concurrency': int(os.environ.get('AI_PRESCRIPTOR_EXTRACT_CONCURRENCY', str(_CPUS))),
+        'queue': int(os.environ.get('AI_PRESCRIPTOR_EXTRACT_QUEUE', '32')),
+    },
+    'pdf': {
+        'concurrency': int(os.environ.get('AI_PRESCRIPTOR_PDF_CONCURRENCY', str(max(1, _CPUS // 2)))),
+        'queue': int(os.environ.get('AI_PRESCRIPTOR_PDF_QUEUE', '16')),
+    },
+    # FFmpeg Opus encoding of archived dictations (dictation_store.py)
+    'archive': {
+        'concurrency': int(os.environ.get('AI_PRESCRIPTOR_ARCHIVE_CONCURRENCY', str(max(1, _CPUS // 2)))),
+        'queue': int(os.environ.get('AI_PRESCRIPTOR_ARCHIVE_QUEUE', '16')),
+    },
+}
+
+# How often a waiting caller is told its position, even when unchanged.
+# Each call gives Streamlit a chance to stop a script the user has rerun.
+WAIT_POLL_SECONDS = 0.5
+
+
+class WorkloadBusy(Exception):
+    """Raised when a workload's queue is full"""
+
+
+class Workload:
+    """Slots and FIFO wait queue for one kind of work"""
+
+    def __init__(self, name, concurrency, max_queue):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.rejected = 0
+        self._waiting = collections.deque()
+        self._cond = threading.Condition()
+
+    @property
+    def queued(self):
+        return len(self._waiting)
+
+    def _publish(self):
+        # Called with the condition held
+        if metrics.enabled():
+            metrics.registry.set_gauge('workload_active', self.active, workload=self.name)
+            metrics.registry.set_gauge('workload_queued', len(self._waiting), workload=self.name)
+            metrics.registry.set_gauge('workload_slots', self.concurrency, workload=self.name)
+            metrics.registry.set_gauge('workload_rejected', self.rejected, workload=self.name)
+
+    def _ready(self, ticket):
+        return self._waiting[0] is ticket and self.active < self.concurrency
+
+    def acquire(self, on_wait=None):
+        """Take a slot, waiting in line if none is free.
+
+        ``on_wait(position)`` is called while waiting, with 1 meaning next
+        in line. Raises WorkloadBusy if the queue is already full.
+        """
+        with self._cond:
+            if self.active < self.concurrency and not self._waiting:
+                self.active += 1
+                self._publish()
+                return
+            if len(self._waiting) >= self.max_queue:
+                self.rejected += 1
+                self._publish()
+                raise WorkloadBusy(f"{self.name} queue is full ({self.max_queue} waiting)")
+            ticket = object()
+            self._waiting.append(ticket)
+            self._publish()
+        try:
+            while True:
+                with self._cond:
+                    if self._ready(ticket):
+                        self._waiting.popleft()
+                        self.active += 1
+                        self._publish()
+                        # The rest of the queue moved up one place
+                        self._cond.notify_all()
+                        return
+                    position = self._waiting.index(ticket) + 1
+                if on_wait is not None:
+                    on_wait(position)
+                with self._cond:
+                    if not self._ready(ticket):
+                        self._cond.wait(WAIT_POLL_SECONDS)
+        except BaseException:
+            # Includes Streamlit stopping the script while it waits
+            with self._cond:
+                self._waiting.remove(ticket)
+                self._publish()
+                self._cond.notify_all()
+            raise
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._publish()
+            self._cond.notify_all()
+
+
+_workloads = {
+    name: Workload(name, settings['concurrency'], settings['queue'])
+    for name, settings in GOVERNOR_CONFIG.items()
+}
+
+
+@contextlib.contextmanager
+def slot(workload, on_wait=None):
+    """Run the block in one of ``workload``'s slots (see Workload.acquire)"""
+    governed = _workloads[workload]
+    governed.acquire(on_wait)
+    try:
+        yield
+    finally:
+        governed.release()
+
+
+def status():
+    """Current slots in use, queue length and rejections per workload"""
+    return [
+        {'workload': workload.name, 'active': workload.active, 'slots': workload.concurrency,
+         'queued': workload.queued, 'max_queue': workload.max_queue, 'rejected': workload.rejected}
+        for workload in _workloads.values()
+    ]
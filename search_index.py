@@ -0,0 +1,162 @@
+import bisect
+import re
+
+from rapidfuzz.distance import Levenshtein
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+# Words shorter than this are matched by prefix only; one typo in a
+# three-letter word matches far too much
+MIN_TYPO_LENGTH = 4
+
+
+def _deletes(word):
+    """All strings formed by removing one character from ``word``"""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class MedicineSearchIndex:
+    """Server-side search over catalog names for the manual entry field.
+
+    Prefix matches come from a sorted array of lower-cased names (binary
+    search, so lookups cost O(log n) regardless of catalog size). Typos are
+    handled SymSpell-style: every catalog word is indexed under its
+    one-character deletions, so a misspelt query word finds its neighbours
+    with a handful of hash lookups instead of a scan.
+
+    Word buckets map each name to the number of catalog rows carrying it.
+    After ``copy()`` both indexes share their word and deletion buckets, and
+    each one copies a bucket the first time it modifies it, so updating a
+    copy never affects the original.
+    """
+
+    def __init__(self, names=()):
+        entries = sorted((name.strip().lower(), name) for name in names)
+        self._keys = [key for key, _ in entries]
+        self._names = [name for _, name in entries]
+        # word -> names containing it, and deletion -> words
+        self._word_names = {}
+        self._deletions = {}
+        # Buckets that belong to this index alone
+        self._owned_words = set()
+        self._owned_deletions = set()
+        for key, name in entries:
+            self._add_words(key, name)
+
+    def copy(self):
+        clone = MedicineSearchIndex()
+        clone._keys = list(self._keys)
+        clone._names = list(self._names)
+        clone._word_names = dict(self._word_names)
+        clone._deletions = dict(self._deletions)
+        self._owned_words = set()
+        self._owned_deletions = set()
+        return clone
+
+    @staticmethod
+    def _own(buckets, owned, key, empty):
+        if key not in owned:
+            bucket = buckets.get(key)
+            buckets[key] = bucket.copy() if bucket is not None else empty()
+            owned.add(key)
+        return buckets[key]
+
+    def _add_words(self, key, name):
+        for word in set(_WORD_RE.findall(key)):
+            new_word = word not in self._word_names
+            names = self._own(self._word_names, self._owned_words, word, dict)
+            names[name] = names.get(name, 0) + 1
+            if new_word and len(word) >= MIN_TYPO_LENGTH:
+                for variant in _deletes(word) | {word}:
+                    self._own(self._deletions, self._owned_deletions, variant, set).add(word)
+
+    def add(self, name):
+        key = name.strip().lower()
+        pos = bisect.bisect_left(self._keys, key)
+        self._keys.insert(pos, key)
+        self._names.insert(pos, name)
+        self._add_words(key, name)
+
+    def remove(self, name):
+        key = name.strip().lower()
+        pos = bisect.bisect_left(self._keys, key)
+        while pos < len(self._keys) and self._keys[pos] == key:
+            if self._names[pos] == name:
+                del self._keys[pos]
+                del self._names[pos]
+                break
+            pos += 1
+        for word in set(_WORD_RE.findall(key)):
+            if name not in self._word_names.get(word, ()):
+                continue
+            names = self._own(self._word_names, self._owned_words, word, dict)
+            if names[name] > 1:
+                names[name] -= 1
+                continue
+            del names[name]
+            if names:
+                continue
+            del self._word_names[word]
+            self._owned_words.discard(word)
+            for variant in _deletes(word) | {word}:
+                if word not in self._deletions.get(variant, ()):
+                    continue
+                words = self._own(self._deletions, self._owned_deletions, variant, set)
+                words.discard(word)
+                if not words:
+                    del self._deletions[variant]
+                    self._owned_deletions.discard(variant)
+
+    def __len__(self):
+        return len(self._names)
+
+    def prefix(self, query, limit=20):
+        """Names starting with ``query`` (case-insensitive), alphabetically"""
+        key = query.strip().lower()
+        pos = bisect.bisect_left(self._keys, key)
+        matches = []
+        while pos < len(self._keys) and len(matches) < limit:
+            if not self._keys[pos].startswith(key):
+                break
+            # Duplicate catalog names sort next to each other
+            if not matches or matches[-1] != self._names[pos]:
+                matches.append(self._names[pos])
+            pos += 1
+        return matches
+
+    def similar_words(self, word):
+        """Catalog words within one edit of ``word``"""
+        if len(word) < MIN_TYPO_LENGTH:
+            return set()
+        candidates = set()
+        for variant in _deletes(word) | {word}:
+            candidates.update(self._deletions.get(variant, ()))
+        # Deletion neighbours can be two edits apart (e.g. two substitutions)
+        return {candidate for candidate in candidates if Levenshtein.distance(word, candidate) <= 1}
+
+    def search(self, query, limit=20):
+        """Top ``limit`` names for a partly typed, possibly misspelt query.
+
+        Exact prefix matches come first, then names containing a word one
+        typo away from the first query word.
+        """
+        results = self.prefix(query, limit)
+        if len(results) >= limit:
+            return results
+        words = _WORD_RE.findall(query.lower())
+        if not words:
+            return results
+        seen = set(results)
+        rest = words[1:]
+        for word in sorted(self.similar_words(words[0])):
+            for name in self._word_names.get(word, ()):
+                if name in seen:
+                    continue
+                # Later query words must still appear as typed
+                if rest and not all(part in name.lower() for part in rest):
+                    continue
+                results.append(name)
+                seen.add(name)
+                if len(results) >= limit:
+                    return results
+        return results
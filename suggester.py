@@ -0,0 +1,124 @@
+"""Symptom-to-medicine suggestions mined from past prescriptions.
+
+Counts how often each symptom term and each medicine appeared in the same
+visit, a visit being one patient's prescription lines of one day.
+Suggesting for new symptoms is then a few dictionary lookups, with no
+model round trip:
+
+    suggester = SymptomSuggester.from_history(db_manager.symptom_history())
+    suggester.suggest('fever and dry cough')
+    # after a save: one line of Dolo 650 added to today's visit
+    suggester.update_visit((patient_id, day), 'fever and dry cough', {'Dolo 650 Tablet': 1})
+"""
+import collections
+import heapq
+import math
+import re
+import threading
+
+_WORD_RE = re.compile(r'[a-z]+')
+
+# Words that say nothing about the condition
+STOPWORDS = frozenset({
+    'and', 'the', 'with', 'for', 'from', 'since', 'has', 'have', 'had', 'was', 'are', 'not', 'but',
+    'also', 'some', 'very', 'patient', 'complains', 'complaint', 'day', 'days', 'week', 'weeks',
+    'month', 'months', 'last', 'past', 'mild', 'moderate', 'severe', 'slight',
+})
+
+
+def tokenize(symptoms):
+    """Distinct symptom terms in free text, lower-cased with plural 's' dropped"""
+    terms = set()
+    for word in _WORD_RE.findall(symptoms.lower()):
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.add(word)
+    return frozenset(terms)
+
+
+class SymptomSuggester:
+    """Symptom-term x medicine co-occurrence counts, shared by all sessions"""
+
+    def __init__(self):
+        # term -> medicine -> visits with both
+        self._pairs = collections.defaultdict(collections.Counter)
+        # term -> visits mentioning it
+        self._term_visits = collections.Counter()
+        self.visits = 0
+        # visit -> (terms, medicine -> lines), so saves can be applied as changes
+        self._visit_lines = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_history(cls, lines):
+        """Build from (visit, symptoms, medicine name) rows, one per prescription line.
+
+        See DatabaseManager.symptom_history(), whose visits are (patient_id, day).
+        """
+        visits = {}
+        for visit, symptoms, medicine in lines:
+            if visit not in visits:
+                visits[visit] = (symptoms, collections.Counter())
+            visits[visit][1][medicine] += 1
+        suggester = cls()
+        for visit, (symptoms, medicines) in visits.items():
+            suggester.update_visit(visit, symptoms, medicines)
+        return suggester
+
+    def _count(self, terms, medicines, sign):
+        # Called with the lock held
+        if not terms or not medicines:
+            return
+        self.visits += sign
+        for term in terms:
+            self._term_visits[term] += sign
+            pairs = self._pairs[term]
+            for medicine in medicines:
+                pairs[medicine] += sign
+                if pairs[medicine] <= 0:
+                    del pairs[medicine]
+            if self._term_visits[term] <= 0:
+                del self._term_visits[term]
+                del self._pairs[term]
+
+    def update_visit(self, visit, symptoms, line_changes):
+        """Apply a save to one visit.
+
+        line_changes maps medicine names to the number of lines added, or
+        removed when negative. A visit counts once however many saves it
+        takes, and drops out when its last line is removed.
+        """
+        with self._lock:
+            terms, lines = self._visit_lines.pop(visit, (frozenset(), collections.Counter()))
+            self._count(terms, lines, -1)
+            lines = collections.Counter(lines)
+            lines.update(line_changes)
+            lines = +lines
+            terms = tokenize(symptoms or '')
+            self._count(terms, lines, 1)
+            if lines:
+                self._visit_lines[visit] = (terms, lines)
+
+    def suggest(self, symptoms, limit=10):
+        """Medicines most often prescribed for these symptoms, best first.
+
+        Each matching term adds the share of its visits that included the
+        medicine, weighted so that rare terms count more than common ones.
+        Returns dicts with 'medicine', 'score' and the matching 'terms'.
+        """
+        scores = collections.defaultdict(float)
+        matched = collections.defaultdict(list)
+        with self._lock:
+            for term in sorted(tokenize(symptoms or '')):
+                term_visits = self._term_visits.get(term)
+                if not term_visits:
+                    continue
+                weight = math.log(1 + self.visits / term_visits) / term_visits
+                for medicine, count in self._pairs[term].items():
+                    scores[medicine] += count * weight
+                    matched[medicine].append(term)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [{'medicine': medicine, 'score': round(score, 4), 'terms': matched[medicine]}
+                for medicine, score in best]
@@ -0,0 +1,142 @@
+"""Speech-to-text engines.
+
+Every engine turns 16 kHz mono float32 samples (see audio_utils.decode_to_pcm)
+into text, so the app and the inference service do not depend on a
+particular library:
+
+    whisper         openai-whisper on PyTorch (FP32 on CPU, FP16 on GPU)
+    faster-whisper  CTranslate2 with int8 weights; several times faster on
+                    CPU (pip install faster-whisper)
+
+The engine, model and decoding preset are chosen with environment
+variables, e.g.:
+
+    AI_PRESCRIPTOR_TRANSCRIPTION_ENGINE=faster-whisper
+    AI_PRESCRIPTOR_TRANSCRIPTION_PRESET=dictation
+"""
+import os
+
+# Transcription configuration - set through environment variables
+TRANSCRIPTION_CONFIG = {
+    'engine': os.environ.get('AI_PRESCRIPTOR_TRANSCRIPTION_ENGINE', 'whisper'),
+    'model': os.environ.get('AI_PRESCRIPTOR_TRANSCRIPTION_MODEL', 'base'),
+    'preset': os.environ.get('AI_PRESCRIPTOR_TRANSCRIPTION_PRESET', 'default'),
+    # faster-whisper only: CTranslate2 weight type and device
+    'compute_type': os.environ.get('AI_PRESCRIPTOR_TRANSCRIPTION_COMPUTE_TYPE', 'int8'),
+    'device': os.environ.get('AI_PRESCRIPTOR_TRANSCRIPTION_DEVICE', 'cpu'),
+}
+
+# Decoding options by preset. 'default' keeps each library's own defaults
+# (language detection, beam search or sampling with temperature fallback,
+# conditioning on the previous window). 'dictation' suits short English
+# dictations: no language detection pass, one greedy decode, and no
+# carried-over text that can make a mistake repeat.
+DECODING_PRESETS = {
+    'default': {},
+    'dictation': {
+        'language': 'en',
+        'beam_size': 1,
+        'temperature': 0.0,
+        'condition_on_previous_text': False,
+    },
+}
+
+
+class TranscriptionEngine:
+    """Interface for speech-to-text backends"""
+
+    name = None
+    # Engine, model and preset, e.g. 'whisper:base:default'; identifies
+    # stored transcripts (see dictation_store.py)
+    label = None
+
+    def transcribe(self, audio):
+        """Transcribe one clip of 16 kHz mono float32 samples"""
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios):
+        """Transcribe several clips; engines that can decode a batch at once override this"""
+        return [self.transcribe(audio) for audio in audios]
+
+
+class WhisperEngine(TranscriptionEngine):
+    """openai-whisper on PyTorch"""
+
+    name = 'whisper'
+
+    def __init__(self, model='base', preset='default'):
+        import torch
+        import whisper
+
+        self._whisper = whisper
+        self.label = f'{self.name}:{model}:{preset}'
+        self.model = whisper.load_model(model)
+        self.options = dict(DECODING_PRESETS[preset])
+        # Whisper decodes greedily when no beam size is given
+        if self.options.get('beam_size') == 1:
+            self.options['beam_size'] = None
+        self.options['fp16'] = torch.cuda.is_available()
+
+    def transcribe(self, audio):
+        return self.model.transcribe(audio, **self.options)['text']
+
+    def transcribe_batch(self, audios):
+        """Decode clips of up to 30 seconds (Whisper's window) in one batch.
+
+        Longer clips go through ``transcribe`` individually.
+        """
+        import torch
+
+        whisper = self._whisper
+        texts = [None] * len(audios)
+        short = [i for i, audio in enumerate(audios) if len(audio) <= whisper.audio.N_SAMPLES]
+        if short:
+            options = whisper.DecodingOptions(**{key: value for key, value in self.options.items()
+                                                 if key != 'condition_on_previous_text'})
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audios[i])), self.model.dims.n_mels)
+                for i in short
+            ]).to(self.model.device)
+            for i, result in zip(short, whisper.decode(self.model, mels, options)):
+                texts[i] = result.text
+        for i, audio in enumerate(audios):
+            if texts[i] is None:
+                texts[i] = self.transcribe(audio)
+        return texts
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """faster-whisper (CTranslate2), int8 on CPU by default"""
+
+    name = 'faster-whisper'
+
+    def __init__(self, model='base', preset='default', compute_type='int8', device='cpu'):
+        from faster_whisper import WhisperModel
+
+        self.label = f'{self.name}:{model}:{preset}'
+        self.model = WhisperModel(model, device=device, compute_type=compute_type)
+        self.options = dict(DECODING_PRESETS[preset])
+
+    def transcribe(self, audio):
+        segments, _ = self.model.transcribe(audio, **self.options)
+        return ''.join(segment.text for segment in segments)
+
+
+ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+def create_engine(engine=None, model=None, preset=None):
+    """Create the configured engine; arguments override TRANSCRIPTION_CONFIG"""
+    engine = engine or TRANSCRIPTION_CONFIG['engine']
+    model = model or TRANSCRIPTION_CONFIG['model']
+    preset = preset or TRANSCRIPTION_CONFIG['preset']
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown transcription engine {engine!r}; choose one of {', '.join(ENGINES)}")
+    if preset not in DECODING_PRESETS:
+        raise ValueError(f"Unknown decoding preset {preset!r}; choose one of {', '.join(DECODING_PRESETS)}")
+    if engine == FasterWhisperEngine.name:
+        return FasterWhisperEngine(model, preset, TRANSCRIPTION_CONFIG['compute_type'], TRANSCRIPTION_CONFIG['device'])
+    return ENGINES[engine](model, preset)
@@ -1,3 +1,7 @@
+from prescription import PrescriptionItem
+from metrics import timed
+from phonetic import PhoneticIndex, transcript_tokens
+
 def word_to_num(word):
     """Convert word numbers to integers"""
     word_dict = {
@@ -7,25 +11,71 @@ def word_to_num(word):
     }
     return word_dict.get(word.lower(), None)
 
-def extract_prescription(text, medicines_list, threshold=80):
-    """Extract prescription information from text, limited to top 5 most similar medicines."""
+def _phonetic_matches(text_lower, phonetic_index, threshold):
+    """Score only the catalog names that sound like a word in the transcript.
+
+    The phonetic index only picks the candidates. Each one is scored like
+    in the full scan, by partial_ratio of the full name against the
+    transcript, but with its brand spelt as dictated, so 'Zyrtec 10mg' is
+    scored as 'sirtek 10mg' after 'sirtek'. Only the best name for each
+    transcript word is kept: a dictated brand matches every strength and
+    form of it in the catalog, and those must not crowd out the other
+    medicines.
+    """
+    from rapidfuzz import fuzz
+
+    best = {}
+    for word, start in transcript_tokens(text_lower):
+        for med in phonetic_index.lookup(word):
+            med_clean = med.strip().lower()
+            brand = PhoneticIndex.brand(med)
+            if med_clean.startswith(brand):
+                med_clean = word + med_clean[len(brand):]
+            score = fuzz.partial_ratio(med_clean, text_lower)
+            if score < threshold:
+                continue
+            # Between equal scores, prefer the brand spelt closest to the word
+            rank = (score, fuzz.ratio(brand, word))
+            found = best.get(start)
+            if found is None or rank > found['rank']:
+                best[start] = {'name': med, 'start': start, 'score': score, 'rank': rank}
+    # A medicine dictated twice is listed once, like in the full scan
+    matches = {}
+    for match in sorted(best.values(), key=lambda x: (-x['score'], x['start'])):
+        matches.setdefault(match['name'], {'name': match['name'], 'start': match['start'],
+                                           'score': match['score']})
+    return list(matches.values())
+
+@timed('extract_prescription')
+def extract_prescription(text, medicines_list, threshold=80, phonetic_index=None):
+    """Extract prescription information from text, limited to top 5 most similar medicines.
+
+    Names scoring at least ``threshold`` are kept. With a ``PhoneticIndex``
+    only names that sound like a transcript word are scored, which also
+    catches brand names Whisper spelled phonetically; without one every
+    name in ``medicines_list`` is scored.
+    """
     prescriptions = []
     import re
     from rapidfuzz import fuzz
 
     found_meds = []
     text_lower = text.lower()
-    for med in medicines_list:
-        med_clean = med.strip().lower()
-        score = fuzz.partial_ratio(med_clean, text_lower)
-        if score >= threshold:
-            start = text_lower.find(med_clean.split()[0])
-            found_meds.append({'name': med, 'start': start, 'score': score})
+    if phonetic_index is not None:
+        found_meds = _phonetic_matches(text_lower, phonetic_index, threshold)
+    else:
+        for med in medicines_list:
+            med_clean = med.strip().lower()
+            score = fuzz.partial_ratio(med_clean, text_lower)
+            if score >= threshold:
+                start = text_lower.find(med_clean.split()[0])
+                found_meds.append({'name': med, 'start': start, 'score': score})
 
     # Sort by highest similarity score, then by order of appearance
     found_meds.sort(key=lambda x: (-x['score'], x['start']))
-    # Limit to top 5 most similar
-    found_meds = found_meds[:5]
+    # Limit to top 5 most similar, then take them in the order they were
+    # dictated so each one's segment ends where the next medicine starts
+    found_meds = sorted(found_meds[:5], key=lambda x: x['start'])
 
     for i in range(len(found_meds)):
         med_name = found_meds[i]['name']
@@ -57,11 +107,6 @@ def extract_prescription(text, medicines_list, threshold=80):
         elif 'after meal' in segment.lower() or 'afternoon' in segment.lower():
             meal = 'After Meal'
         
-        prescriptions.append({
-            'Medicine Name': med_name,
-            'Number of Days': days,
-            'Tablets per Day': tablets,
-            'Meal Time': meal
-        })
+        prescriptions.append(PrescriptionItem(med_name, days, tablets, meal))
     
     return prescriptions 
\ No newline at end of file